@@ -9,31 +9,36 @@
 from flask import Flask, request, jsonify, send_from_directory
 import os
 import shutil
+import sketch_store
+from sketch_store import save_upload, load_result, pipeline_key
 from compile import compile_ino
 from openai_agent import analyze_code  # your dynamic agent
+from tracing import span, start_trace, render_metrics
+from scheduler import SCHEDULER
+from warmup import start_warmup, readiness
 # Removed pcbgen import since it doesn't exist
 
 app = Flask(__name__)
 
-UPLOAD_DIR = "uploads"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
-
-@app.route("/upload", methods=["POST"])
-def upload_ino():
-    if "file" not in request.files:
-        return jsonify({"status": "failed", "error": "No file uploaded"}), 400
-
-    file = request.files["file"]
-    filepath = os.path.join(UPLOAD_DIR, file.filename)
-    file.save(filepath)
+@app.before_request
+def _warm_up():
+    # Prime board list, library resolution and cores in the background, from the
+    # process that serves requests (not on import, not in the debug reloader's
+    # parent). A no-op after the first call; __main__ starts it before any request.
+    start_warmup()
 
+def run_pipeline(filepath):
+    """compile -> analyze for one stored sketch."""
     # Call compile function dynamically
-    status, chip, logs = compile_ino(filepath)
+    with span("compile") as s:
+        status, chip, logs = compile_ino(filepath)
+        s["chip"] = chip
 
     pcb_data = None
     if status == "success":
         # Call OpenAI agent dynamically with uploaded file + chip
-        pcb_data = analyze_code(filepath, chip)
+        with span("analyze"):
+            pcb_data = analyze_code(filepath, chip)
         
         # Print the OpenAI agent output to terminal
         print("\n" + "="*50)
@@ -42,14 +47,53 @@ def upload_ino():
         print(pcb_data)
         print("="*50 + "\n")
 
-    result = {
+    return {
         "status": status,
         "chip": chip,
         "logs": logs,
         "pcb_data": pcb_data,
         "gerber": None  # Set to None since we're not generating PCBs
     }
-    return jsonify(result)
+
+def memoized_pipeline(digest, filepath):
+    """Stored or shared-in-flight result for this content hash (see sketch_store)."""
+    return sketch_store.memoized_pipeline(digest, lambda: run_pipeline(filepath))
+
+@app.route("/upload", methods=["POST"])
+def upload_ino():
+    if "file" not in request.files:
+        return jsonify({"status": "failed", "error": "No file uploaded"}), 400
+
+    digest, filepath = save_upload(request.files["file"])
+    etag = pipeline_key(digest)
+
+    if etag in request.if_none_match and load_result(digest) is not None:
+        return "", 304, {"ETag": f'"{etag}"'}
+
+    trace = start_trace()
+    with span("upload"):
+        result = memoized_pipeline(digest, filepath)
+
+    # Spans of this request only; stored results never carry a trace
+    response = jsonify(dict(result, trace=trace))
+    # Only stored results are stable; a failure must not be revalidated as a 304 later
+    if result["status"] == "success":
+        response.set_etag(etag)
+    return response
+
+@app.route("/metrics")
+def metrics():
+    text = render_metrics() + SCHEDULER.render_metrics()
+    return text, 200, {"Content-Type": "text/plain; version=0.0.4"}
+
+@app.route("/scheduler")
+def scheduler_stats():
+    return jsonify(SCHEDULER.stats())
+
+@app.route("/ready")
+def ready():
+    state = readiness()
+    return jsonify(state), 200 if state["status"] == "ready" else 503
 
 # Optional: serve frontend directly from Flask
 @app.route("/")
@@ -61,4 +105,7 @@ def serve_static(path):
     return send_from_directory("frontend", path)
 
 if __name__ == "__main__":
+    # With the reloader on, only the child (WERKZEUG_RUN_MAIN=true) serves requests
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_warmup()
     app.run(host="0.0.0.0", port=8000, debug=True)
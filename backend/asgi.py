@@ -0,0 +1,265 @@
+# Async (ASGI) version of app.py
+# Run with: hypercorn asgi:app --bind 0.0.0.0:8000 --workers 2
+#
+# Compile steps run as asyncio subprocesses with timeouts and the LLM calls are
+# awaited, so a slow upload no longer pins a worker thread. If the client
+# disconnects, the request task is cancelled and the running arduino-cli is killed.
+
+from quart import Quart, request, jsonify, send_from_directory
+import os
+import io
+import json
+import asyncio
+import zipfile
+import contextlib
+
+from sketch_store import save_upload, store_sketch, load_result, store_result, pipeline_key
+from compile import compile_ino_async, get_installed_boards_async
+from openai_agent import analyze_code_async
+from tracing import span, start_trace, render_metrics
+from scheduler import SCHEDULER
+from warmup import start_warmup, readiness
+
+app = Quart(__name__)
+# Let browsers cache frontend/ assets; Quart answers conditional requests with 304
+app.config["SEND_FILE_MAX_AGE_DEFAULT"] = 3600
+
+@app.before_serving
+async def _warm_up():
+    # Once per serving process, not on import (scripts, tests, loadtest)
+    start_warmup()
+
+# pipeline_key() -> {"task": asyncio.Task, "waiters": int}
+_INFLIGHT = {}
+
+MAX_BATCH_SKETCHES = 200
+# Larger sketches (zip members or plain files) are skipped, never decompressed
+MAX_SKETCH_BYTES = int(os.getenv("BATCH_MAX_SKETCH_BYTES", str(1024 * 1024)))
+# Compiles running at once for /upload/batch, shared by all batches
+BATCH_COMPILE_SLOTS = asyncio.Semaphore(int(os.getenv("BATCH_COMPILE_WORKERS", "4")))
+
+class RateLimiter:
+    """At most `concurrency` calls in flight and `per_minute` call starts per minute."""
+    def __init__(self, per_minute, concurrency):
+        self._slots = asyncio.Semaphore(concurrency)
+        self._interval = 60.0 / per_minute
+        self._next_start = 0.0
+
+    async def __aenter__(self):
+        await self._slots.acquire()
+        now = asyncio.get_running_loop().time()
+        wait = self._next_start - now
+        self._next_start = max(now, self._next_start) + self._interval
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except BaseException:
+                self._slots.release()
+                raise
+        return self
+
+    async def __aexit__(self, *exc):
+        self._slots.release()
+
+# Every model call from this server goes through one limiter
+LLM_LIMITER = RateLimiter(
+    per_minute=float(os.getenv("LLM_REQUESTS_PER_MINUTE", "300")),
+    concurrency=int(os.getenv("LLM_CONCURRENCY", "8")),
+)
+
+async def run_pipeline_async(filepath, boards=None, lib_cache=None, compile_slots=None):
+    """compile -> analyze for one stored sketch, without blocking the loop."""
+    async with (compile_slots or contextlib.nullcontext()):
+        with span("compile") as s:
+            status, chip, logs = await compile_ino_async(filepath, boards=boards, lib_cache=lib_cache)
+            s["chip"] = chip
+
+    pcb_data = None
+    if status == "success":
+        async with LLM_LIMITER:
+            with span("analyze"):
+                pcb_data = await analyze_code_async(filepath, chip)
+
+    return {
+        "status": status,
+        "chip": chip,
+        "logs": logs,
+        "pcb_data": pcb_data,
+        "gerber": None  # Set to None since we're not generating PCBs
+    }
+
+async def _run_and_store(digest, filepath):
+    result = await run_pipeline_async(filepath)
+    store_result(digest, result)
+    return result
+
+def _forget(key, task):
+    # Only if the entry is still ours; a newer task may already own the key
+    entry = _INFLIGHT.get(key)
+    if entry is not None and entry["task"] is task:
+        del _INFLIGHT[key]
+
+async def memoized_pipeline_async(digest, filepath):
+    """
+    Async memoized_pipeline: identical uploads share one task. The task is only
+    cancelled once every request waiting on it has gone away.
+    """
+    key = pipeline_key(digest)
+    entry = _INFLIGHT.get(key)
+    if entry is None:
+        cached = load_result(digest)
+        if cached is not None:
+            return cached
+        task = asyncio.create_task(_run_and_store(digest, filepath))
+        entry = _INFLIGHT[key] = {"task": task, "waiters": 0}
+        task.add_done_callback(lambda t: _forget(key, t))
+
+    entry["waiters"] += 1
+    try:
+        return await asyncio.shield(entry["task"])
+    finally:
+        entry["waiters"] -= 1
+        if entry["waiters"] == 0 and not entry["task"].done():
+            # Drop it now: a new upload must not join a task that is being cancelled
+            _forget(key, entry["task"])
+            entry["task"].cancel()
+
+@app.route("/upload", methods=["POST"])
+async def upload_ino():
+    files = await request.files
+    if "file" not in files:
+        return jsonify({"status": "failed", "error": "No file uploaded"}), 400
+
+    digest, filepath = save_upload(files["file"])
+    etag = pipeline_key(digest)
+
+    if etag in request.if_none_match and load_result(digest) is not None:
+        return "", 304, {"ETag": f'"{etag}"'}
+
+    trace = start_trace()
+    with span("upload"):
+        result = await memoized_pipeline_async(digest, filepath)
+
+    response = jsonify(dict(result, trace=trace))
+    if result["status"] == "success":  # only stored results get an ETag (see app.py)
+        response.set_etag(etag)
+    return response
+
+@app.route("/metrics")
+async def metrics():
+    text = render_metrics() + SCHEDULER.render_metrics()
+    return text, 200, {"Content-Type": "text/plain; version=0.0.4"}
+
+@app.route("/scheduler")
+async def scheduler_stats():
+    return jsonify(SCHEDULER.stats())
+
+@app.route("/ready")
+async def ready():
+    state = readiness()
+    return jsonify(state), 200 if state["status"] == "ready" else 503
+
+class BatchTooLarge(ValueError):
+    """More sketches in a batch than MAX_BATCH_SKETCHES."""
+
+def _collect_batch(files):
+    """
+    Sketches from a multi-file form ("files"/"file" fields, .ino or .zip).
+    Returns (groups, skipped): groups is {digest: {"filepath": str, "filenames": [str, ...]}},
+    duplicates share one entry; skipped lists {"filename", "error"} of sketches over MAX_SKETCH_BYTES.
+    Raises BatchTooLarge as soon as the batch goes over MAX_BATCH_SKETCHES.
+    """
+    sketches, skipped = [], []
+
+    def add(name, size, read):
+        if len(sketches) + len(skipped) >= MAX_BATCH_SKETCHES:
+            raise BatchTooLarge(f"Too many sketches, at most {MAX_BATCH_SKETCHES} per batch")
+        data = read(MAX_SKETCH_BYTES + 1) if size <= MAX_SKETCH_BYTES else b""
+        if size > MAX_SKETCH_BYTES or len(data) > MAX_SKETCH_BYTES:
+            skipped.append({"filename": name, "error": f"Larger than {MAX_SKETCH_BYTES} bytes"})
+        else:
+            sketches.append((name, data))
+
+    for storage in files.getlist("files") + files.getlist("file"):
+        name = storage.filename or ""
+        if name.lower().endswith(".zip"):
+            with zipfile.ZipFile(io.BytesIO(storage.read())) as archive:
+                for member in archive.infolist():
+                    if not member.is_dir() and member.filename.lower().endswith(".ino"):
+                        def read(limit, member=member):
+                            # Bounded read: file_size in the header can't be trusted
+                            with archive.open(member) as f:
+                                return f.read(limit)
+                        add(os.path.basename(member.filename), member.file_size, read)
+        else:
+            add(name, 0, storage.read)
+
+    groups = {}
+    for name, data in sketches:
+        digest, filepath = store_sketch(data, name)
+        group = groups.setdefault(digest, {"filepath": filepath, "filenames": []})
+        group["filenames"].append(name)
+    return groups, skipped
+
+async def _batch_item(digest, group, boards, lib_cache):
+    # Runs in its own task, so this trace only collects this sketch's spans
+    trace = start_trace()
+    item = {"sha256": digest, "filenames": group["filenames"], "cached": False, "trace": trace}
+    result = load_result(digest)
+    if result is not None:
+        item["cached"] = True
+    else:
+        try:
+            result = await run_pipeline_async(group["filepath"], boards, lib_cache, BATCH_COMPILE_SLOTS)
+        except Exception as e:
+            result = {"status": "failed", "chip": None, "logs": f"❌ {e}", "pcb_data": None, "gerber": None}
+        store_result(digest, result)
+    item.update(result)
+    return item
+
+@app.route("/upload/batch", methods=["POST"])
+async def upload_batch():
+    """
+    Compile + analyze many sketches at once. Streams one JSON line per unique
+    sketch (application/x-ndjson) as soon as it finishes; sketches over the
+    size limit get a "skipped" line up front.
+    """
+    try:
+        groups, skipped = _collect_batch(await request.files)
+    except zipfile.BadZipFile:
+        return jsonify({"status": "failed", "error": "Invalid zip file"}), 400
+    except BatchTooLarge as e:
+        return jsonify({"status": "failed", "error": str(e)}), 400
+    if not groups and not skipped:
+        return jsonify({"status": "failed", "error": "No .ino files uploaded"}), 400
+
+    async def results():
+        for item in skipped:
+            yield json.dumps({"status": "skipped", "filenames": [item["filename"]], "error": item["error"]}) + "\n"
+
+        # One board listing and one library resolution per include for the whole batch
+        boards = None
+        if any(load_result(d) is None for d in groups):
+            boards = await get_installed_boards_async()
+        lib_cache = {}
+        tasks = [asyncio.ensure_future(_batch_item(d, g, boards, lib_cache)) for d, g in groups.items()]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield json.dumps(await finished) + "\n"
+        finally:
+            # Client went away: stop whatever is still queued or compiling
+            for task in tasks + list(lib_cache.values()):
+                task.cancel()
+
+    return results(), 200, {"Content-Type": "application/x-ndjson"}
+
+@app.route("/")
+async def serve_index():
+    return await send_from_directory("frontend", "index.html")
+
+@app.route("/<path:path>")
+async def serve_static(path):
+    return await send_from_directory("frontend", path)
+
+if __name__ == "__main__":
+    app.run(host="0.0.0.0", port=8000)
@@ -0,0 +1,99 @@
+# Cold-start timing for the Flask server against the fake arduino-cli.
+#
+#   cd backend
+#   python -m bench.coldstart              # import time, boot -> first response, boot -> /ready
+#   python -m bench.coldstart --runs 5 --compile-ms 2000
+#
+# Run it on two revisions (git stash / checkout) to compare before and after.
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BACKEND_DIR)
+
+from bench.fake_arduino_cli import install_fake_cli
+
+SERVER = "from app import app; app.run(host='127.0.0.1', port={port}, debug=False)"
+
+def _get(url):
+    try:
+        with urllib.request.urlopen(url, timeout=1) as r:
+            return r.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return None
+
+def import_time(env):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import app"], cwd=BACKEND_DIR, env=env, check=True,
+                   stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+def boot_times(env, port, timeout):
+    """(seconds until / answers, seconds until /ready says 200, or None)."""
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-c", SERVER.format(port=port)], cwd=BACKEND_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    first = ready = None
+    try:
+        while time.perf_counter() - start < timeout:
+            if first is None and _get(f"http://127.0.0.1:{port}/") == 200:
+                first = time.perf_counter() - start
+            if first is not None:
+                status = _get(f"http://127.0.0.1:{port}/ready")
+                if status == 200:
+                    ready = time.perf_counter() - start
+                    break
+                if status == 404:  # revision without /ready
+                    break
+            time.sleep(0.02)
+    finally:
+        proc.terminate()
+        proc.wait()
+    return first, ready
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure server cold start")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--listall-ms", type=float, default=300)
+    parser.add_argument("--lib-ms", type=float, default=200)
+    parser.add_argument("--compile-ms", type=float, default=1000)
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        cli = install_fake_cli(workdir, args.listall_ms, args.lib_ms, args.compile_ms)
+        env = dict(os.environ, ARDUINO_CLI=cli)
+        env["COMPILE_COSTS_FILE"] = os.path.join(workdir, "compile_costs.json")
+        env.setdefault("OPENAI_API_KEY", "bench")
+
+        imports, firsts, readies = [], [], []
+        for _ in range(args.runs):
+            imports.append(import_time(dict(env, WARMUP="0")))
+            first, ready = boot_times(env, args.port, args.timeout)
+            if first is not None:
+                firsts.append(first)
+            if ready is not None:
+                readies.append(ready)
+
+    def fmt(values):
+        return f"{statistics.median(values) * 1000:8.0f} ms" if values else "       -"
+
+    print(f"import app                {fmt(imports)}")
+    print(f"boot -> first response    {fmt(firsts)}")
+    print(f"boot -> /ready (warm)     {fmt(readies)}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+# Deterministic benchmark corpus: sketches, design JSONs (tiny -> 500 parts)
+# and a small footprint library the design JSONs point at.
+
+import os
+import copy
+import random
+
+# name -> (pad names, pad pitch mm, SMD?, courtyard w x h mm, description, tags)
+FOOTPRINTS = {
+    ("Resistor_SMD", "R_0805_2012Metric"): (["1", "2"], 1.9, True, (3.4, 1.9),
+                                            "Resistor SMD 0805 (2012 Metric)", "resistor"),
+    ("Capacitor_SMD", "C_0805_2012Metric"): (["1", "2"], 1.9, True, (3.4, 1.9),
+                                             "Capacitor SMD 0805 (2012 Metric)", "capacitor"),
+    ("LED_SMD", "LED_0805_2012Metric"): (["1", "2"], 1.9, True, (3.4, 1.9),
+                                         "LED SMD 0805 (2012 Metric)", "LED diode"),
+    ("Package_SO", "SOIC-8_3.9x4.9mm_P1.27mm"): ([str(i) for i in range(1, 9)], 1.27, True, (7.4, 5.4),
+                                                 "SOIC, 8 Pin, 3.9x4.9mm body", "SOIC SO"),
+    ("Package_DIP", "DIP-28_W7.62mm"): ([str(i) for i in range(1, 29)], 2.54, False, (9.6, 35.5),
+                                        "28-lead through-hole DIP package, row spacing 7.62 mm", "THT DIP DIL PDIP 2.54mm 7.62mm"),
+    ("Connector_PinHeader_2.54mm", "PinHeader_1x04_P2.54mm_Vertical"): (["1", "2", "3", "4"], 2.54, False, (3.1, 10.2),
+                                                                       "Through hole straight pin header, 1x04, 2.54mm pitch", "Through hole pin header THT 1x04 2.54mm"),
+}
+
+def _kicad_mod(fpname, pads, pitch, smd, courtyard, descr, tags):
+    w, h = courtyard
+    lines = [
+        f"(footprint \"{fpname}\" (version 20211014) (generator pcbnew)",
+        "  (layer \"F.Cu\")",
+        f"  (descr \"{descr}\")",
+        f"  (tags \"{tags}\")",
+        "  (attr smd)" if smd else "  (attr through_hole)",
+        "  (fp_text reference \"REF**\" (at 0 -1.65) (layer \"F.SilkS\")",
+        "    (effects (font (size 1 1) (thickness 0.15)))",
+        "  )",
+        f"  (fp_text value \"{fpname}\" (at 0 1.65) (layer \"F.Fab\")",
+        "    (effects (font (size 1 1) (thickness 0.15)))",
+        "  )",
+        f"  (fp_line (start {-w / 2:g} {-h / 2:g}) (end {w / 2:g} {-h / 2:g}) (layer \"F.CrtYd\") (width 0.05))",
+        f"  (fp_line (start {w / 2:g} {-h / 2:g}) (end {w / 2:g} {h / 2:g}) (layer \"F.CrtYd\") (width 0.05))",
+        f"  (fp_line (start {w / 2:g} {h / 2:g}) (end {-w / 2:g} {h / 2:g}) (layer \"F.CrtYd\") (width 0.05))",
+        f"  (fp_line (start {-w / 2:g} {h / 2:g}) (end {-w / 2:g} {-h / 2:g}) (layer \"F.CrtYd\") (width 0.05))",
+    ]
+    per_row = (len(pads) + 1) // 2 if len(pads) > 4 else len(pads)
+    for i, pad in enumerate(pads):
+        row, col = divmod(i, per_row)
+        x = round((col - (per_row - 1) / 2) * pitch, 3) if len(pads) <= 4 else round((row - 0.5) * 7.62, 3)
+        y = 0 if len(pads) <= 4 else round((col - (per_row - 1) / 2) * pitch, 3)
+        if smd:
+            lines.append(f"  (pad \"{pad}\" smd roundrect (at {x:g} {y:g}) (size 1 1.45) "
+                         "(layers \"F.Cu\" \"F.Paste\" \"F.Mask\") (roundrect_rratio 0.25))")
+        else:
+            lines.append(f"  (pad \"{pad}\" thru_hole {'rect' if i == 0 else 'oval'} (at {x:g} {y:g}) (size 1.6 1.6) "
+                         "(drill 0.8) (layers *.Cu *.Mask))")
+    lines.append(")")
+    return "\n".join(lines) + "\n"
+
+def write_footprint_library(root):
+    """Write the FOOTPRINTS as .pretty/.kicad_mod files under root. Returns root."""
+    for (lib, fpname), (pads, pitch, smd, courtyard, descr, tags) in FOOTPRINTS.items():
+        libdir = os.path.join(root, f"{lib}.pretty")
+        os.makedirs(libdir, exist_ok=True)
+        with open(os.path.join(libdir, f"{fpname}.kicad_mod"), "w", encoding="utf-8") as f:
+            f.write(_kicad_mod(fpname, pads, pitch, smd, courtyard, descr, tags))
+    return root
+
+def sketches():
+    """[(name, code)] from a blink to a heavy multi-library ESP32 sketch, plus failures."""
+    rng = random.Random(1234)
+    blink = (
+        "void setup() {\n  pinMode(13, OUTPUT);\n}\n\n"
+        "void loop() {\n  digitalWrite(13, HIGH);\n  delay(500);\n  digitalWrite(13, LOW);\n  delay(500);\n}\n"
+    )
+
+    def body(n):
+        pins = [rng.randrange(2, 14) for _ in range(n)]
+        setup = "".join(f"  pinMode({p}, OUTPUT);\n" for p in pins)
+        loop = "".join(f"  digitalWrite({p}, analogRead(A{i % 6}) > 512);\n" for i, p in enumerate(pins))
+        return f"void setup() {{\n{setup}}}\n\nvoid loop() {{\n{loop}  delay(10);\n}}\n"
+
+    return [
+        ("blink", blink),
+        ("servo", "#include <Servo.h>\nServo s;\n" + body(3)),
+        ("sensors", "#include <Wire.h>\n#include <SPI.h>\n#include <DHT.h>\n" + body(12)),
+        ("display", "#include <Wire.h>\n#include <Adafruit_GFX.h>\n#include <Adafruit_SSD1306.h>\n" + body(24)),
+        ("wifi_esp32", "// bench:requires=esp32\n#include <WiFi.h>\n#include <WebServer.h>\n" + body(16)),
+        ("camera_esp32", "// bench:requires=esp32:esp32:esp32cam\n// bench:cost=3\n#include <esp_camera.h>\n#include <WiFi.h>\n" + body(40)),
+        ("pico_only", "// bench:requires=rp2040\n" + body(8)),
+        ("broken", "// bench:fail\n" + body(4)),
+    ]
+
+_PARTS = [
+    ("R", "Resistor", "R_0805_2012Metric", ["1", "2"]),
+    ("C", "Capacitor", "C_0805_2012Metric", ["1", "2"]),
+    ("D", "LED", "LED_0805_2012Metric", ["1", "2"]),
+    ("U", "IC", "SOIC-8_3.9x4.9mm_P1.27mm", [str(i) for i in range(1, 9)]),
+    ("J", "Connector", "PinHeader_1x04_P2.54mm_Vertical", ["1", "2", "3", "4"]),
+]
+
+def design(n_components, lib_root, seed=0):
+    """Design JSON with one MCU and n_components - 1 parts on a grid, chained together."""
+    rng = random.Random(seed + n_components)
+    cols = max(1, int(n_components ** 0.5))
+    pitch = 8.0
+    width = max(50.0, (cols + 2) * pitch)
+    height = max(40.0, ((n_components // cols) + 3) * pitch)
+
+    components = [{"name": "MCU1", "type": "ATmega328P", "footprint": "DIP-28_W7.62mm",
+                   "position": {"x": width / 2, "y": 20.0}, "rotation": 0}]
+    pins = {"MCU1": [str(i) for i in range(1, 29)]}
+    counters = {}
+    for i in range(1, n_components):
+        prefix, kind, fp, fp_pins = _PARTS[rng.randrange(len(_PARTS))]
+        counters[prefix] = counters.get(prefix, 0) + 1
+        name = f"{prefix}{counters[prefix]}"
+        row, col = divmod(i - 1, cols)
+        components.append({
+            "name": name, "type": kind, "footprint": fp,
+            "position": {"x": pitch * (col + 1), "y": 40.0 + pitch * row},
+            "rotation": rng.choice([0, 90, 180, 270]),
+        })
+        pins[name] = fp_pins
+
+    connections = []
+    names = [c["name"] for c in components]
+    for a, b in zip(names, names[1:]):
+        connections.append({"from": f"{a}:{pins[a][-1]}", "to": f"{b}:{pins[b][0]}"})
+    for name in names[1::7]:
+        connections.append({"from": f"MCU1:{rng.choice(pins['MCU1'])}", "to": f"{name}:{pins[name][0]}"})
+    # Ground return for every fifth part, so the GND pour has work to do
+    for name in names[5::5]:
+        connections.append({"from": "MCU1:GND", "to": f"{name}:{pins[name][-1]}"})
+
+    return {
+        "board": {"size": {"width": width, "height": height}, "track_width": 0.25,
+                  "clearance": 0.2, "layers": ["F.Copper", "B.Copper"]},
+        "components": components,
+        "connections": connections,
+        "drills": [{"position": {"x": x, "y": y}, "diameter": 3.2}
+                   for x, y in ((3, 3), (width - 3, 3), (3, height - 3), (width - 3, height - 3))],
+        "power": {"voltage": "5V", "regulator": "AMS1117-5.0", "pours": [{"net": "GND", "layer": "B.Cu"}]},
+        "libraries": {"footprint_paths": [lib_root]},
+    }
+
+DESIGN_SIZES = (1, 10, 100, 500)
+
+def designs(lib_root):
+    return [(f"design_{n}", design(n, lib_root)) for n in DESIGN_SIZES]
+
+def one_component_edit(pcb_json):
+    """Copy of the design with its last component moved by 2 mm."""
+    edited = copy.deepcopy(pcb_json)
+    comp = edited["components"][-1]
+    comp["position"] = {"x": comp["position"]["x"] + 2.0, "y": comp["position"]["y"]}
+    return edited
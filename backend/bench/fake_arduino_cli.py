@@ -0,0 +1,113 @@
+# Fake arduino-cli for benchmarks.
+#
+# Answers `board listall`, `lib search`, `lib install` and `compile` after a
+# configurable delay. Latencies come from the environment (milliseconds):
+#   FAKE_CLI_LISTALL_MS, FAKE_CLI_LIB_MS, FAKE_CLI_COMPILE_MS
+# Failure patterns:
+#   FAKE_CLI_FAIL_FQBNS      comma separated FQBNs that never compile
+#   "// bench:fail"          in a sketch: fails on every board
+#   "// bench:requires=X"    in a sketch: only FQBNs starting with X compile
+#   "// bench:cost=N"        in a sketch: compile takes N times longer
+#
+# Use install_fake_cli() to get an executable path for compile.ARDUINO_CLI.
+
+import os
+import re
+import sys
+import time
+
+BOARDS = [
+    ("Arduino Uno", "arduino:avr:uno"),
+    ("Arduino Nano", "arduino:avr:nano"),
+    ("Arduino Mega or Mega 2560", "arduino:avr:mega"),
+    ("Arduino Micro", "arduino:avr:micro"),
+    ("Arduino Leonardo", "arduino:avr:leonardo"),
+    ("Arduino Yún", "arduino:avr:yun"),
+    ("Arduino Pro or Pro Mini", "arduino:avr:pro"),
+    ("ESP32 Dev Module", "esp32:esp32:esp32"),
+    ("DOIT ESP32 DEVKIT V1", "esp32:esp32:esp32doit-devkit-v1"),
+    ("AI Thinker ESP32-CAM", "esp32:esp32:esp32cam"),
+    ("Node32s", "esp32:esp32:node32s"),
+    ("ESP32S3 Dev Module", "esp32:esp32:esp32s3"),
+    ("Raspberry Pi Pico", "rp2040:rp2040:rpipico"),
+]
+
+def _sleep_ms(var, factor=1.0):
+    ms = float(os.getenv(var, "0")) * factor
+    if ms > 0:
+        time.sleep(ms / 1000.0)
+
+def _read_sketch(sketch_dir):
+    name = os.path.basename(os.path.normpath(sketch_dir))
+    try:
+        with open(os.path.join(sketch_dir, f"{name}.ino"), "r", encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        return ""
+
+def _compile(fqbn, sketch_dir):
+    code = _read_sketch(sketch_dir)
+    cost = re.search(r"//\s*bench:cost=([\d.]+)", code)
+    _sleep_ms("FAKE_CLI_COMPILE_MS", float(cost.group(1)) if cost else 1.0)
+
+    failing = [f for f in os.getenv("FAKE_CLI_FAIL_FQBNS", "").split(",") if f]
+    requires = re.search(r"//\s*bench:requires=(\S+)", code)
+    if "// bench:fail" in code or fqbn in failing or (requires and not fqbn.startswith(requires.group(1))):
+        print(f"Error during build: exit status 1 ({fqbn})", file=sys.stderr)
+        return 1
+
+    size = len(code) * 4 + 900
+    print(f"Sketch uses {size} bytes (2%) of program storage space. Maximum is 32256 bytes.")
+    return 0
+
+def main(args):
+    if args[:2] == ["board", "listall"]:
+        _sleep_ms("FAKE_CLI_LISTALL_MS")
+        print("Board Name                        FQBN")
+        for name, fqbn in BOARDS:
+            print(f"{name:<34}{fqbn}")
+        return 0
+    if args[:2] == ["lib", "search"]:
+        _sleep_ms("FAKE_CLI_LIB_MS")
+        lib = os.path.splitext(args[2])[0] if len(args) > 2 else ""
+        if lib:
+            print(f"Name: {lib}")
+            print("  Author: bench")
+        else:
+            print("No libraries matching your search.")
+        return 0
+    if args[:2] == ["lib", "install"]:
+        _sleep_ms("FAKE_CLI_LIB_MS")
+        return 0
+    if args[:1] == ["compile"] and "--fqbn" in args:
+        fqbn = args[args.index("--fqbn") + 1]
+        return _compile(fqbn, args[-1])
+    print(f"fake arduino-cli: unsupported command {args}", file=sys.stderr)
+    return 2
+
+def install_fake_cli(workdir, listall_ms=0, lib_ms=0, compile_ms=0, fail_fqbns=()):
+    """
+    Write an executable `arduino-cli` wrapper into workdir (arduino-cli.cmd on
+    Windows) and set the latency env vars it reads. Returns the wrapper path.
+    """
+    os.environ["FAKE_CLI_LISTALL_MS"] = str(listall_ms)
+    os.environ["FAKE_CLI_LIB_MS"] = str(lib_ms)
+    os.environ["FAKE_CLI_COMPILE_MS"] = str(compile_ms)
+    os.environ["FAKE_CLI_FAIL_FQBNS"] = ",".join(fail_fqbns)
+
+    script = os.path.abspath(__file__)
+    if os.name == "nt":
+        # CreateProcess runs .cmd files directly, so this works as cmd[0] too
+        wrapper = os.path.join(workdir, "arduino-cli.cmd")
+        with open(wrapper, "w") as f:
+            f.write(f'@echo off\r\n"{sys.executable}" "{script}" %*\r\n')
+        return wrapper
+
+    wrapper = os.path.join(workdir, "arduino-cli")
+    with open(wrapper, "w") as f:
+        f.write(f'#!/bin/sh\nexec "{sys.executable}" "{script}" "$@"\n')
+    os.chmod(wrapper, 0o755)
+    return wrapper
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
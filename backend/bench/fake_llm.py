@@ -0,0 +1,59 @@
+# Fake chat model for benchmarks: drop-in for openai_agent.llm.
+#
+# Answers with a design JSON built from the sketch it is sent, after a fixed
+# latency plus a per-output-token delay. Every `invalid_every`-th answer is
+# wrapped in prose so analyze_code's JSON-fixing retry path gets exercised.
+
+import re
+import json
+import time
+import asyncio
+
+class FakeMessage:
+    def __init__(self, content, usage):
+        self.content = content
+        self.usage_metadata = usage
+
+class FakeChatModel:
+    def __init__(self, latency_ms=0, ms_per_token=0.0, invalid_every=0):
+        self.latency_ms = latency_ms
+        self.ms_per_token = ms_per_token
+        self.invalid_every = invalid_every
+        self.calls = 0
+
+    def _answer(self, messages):
+        self.calls += 1
+        # (role, content) pairs or LangChain message objects
+        prompt = "\n".join(str(m[1] if isinstance(m, tuple) else m.content) for m in messages)
+        if "JSON fixer" in prompt:
+            # Second attempt: return the JSON embedded in the text we were given
+            match = re.search(r"\{.*\}", prompt, re.S)
+            text = match.group(0) if match else "{}"
+        else:
+            pins = sorted(set(re.findall(r"\b(?:pinMode|digitalWrite|analogRead)\s*\(\s*(\w+)", prompt)))
+            design = {
+                "components": [{"name": "U1", "type": "MCU", "footprint": "DIP-28_W7.62mm"}]
+                + [{"name": f"R{i + 1}", "type": "Resistor", "footprint": "R_0805_2012Metric"}
+                   for i in range(len(pins))],
+                "connections": [{"from": f"U1:{pin}", "to": f"R{i + 1}:1"} for i, pin in enumerate(pins)],
+                "power": {"voltage": "5V", "regulator": "AMS1117-5.0"},
+            }
+            text = json.dumps(design)
+            if self.invalid_every and self.calls % self.invalid_every == 0:
+                text = "Here is the design you asked for:\n" + text
+
+        tokens_in = len(prompt) // 4
+        tokens_out = len(text) // 4
+        delay = (self.latency_ms + self.ms_per_token * tokens_out) / 1000.0
+        usage = {"input_tokens": tokens_in, "output_tokens": tokens_out, "total_tokens": tokens_in + tokens_out}
+        return FakeMessage(text, usage), delay
+
+    def invoke(self, messages):
+        message, delay = self._answer(messages)
+        time.sleep(delay)
+        return message
+
+    async def ainvoke(self, messages):
+        message, delay = self._answer(messages)
+        await asyncio.sleep(delay)
+        return message
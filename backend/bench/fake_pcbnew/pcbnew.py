@@ -0,0 +1,461 @@
+# Fake `pcbnew` for benchmarks: put this folder first on sys.path and
+# pcbgen.py / pcbgenfull.py run without KiCad.
+#
+# Covers only the API the generators use. Footprints are read from the real
+# .kicad_mod files (pads, offsets and sizes), boards live in memory, and every
+# call is counted in OPS so a benchmark can report what a run did.
+
+import os
+import re
+import time
+import json
+from collections import Counter
+
+OPS = Counter()
+
+# Simulated cost of pcbnew.FootprintLoad / plotting one layer (ms)
+FOOTPRINT_LOAD_MS = float(os.getenv("FAKE_PCBNEW_LOAD_MS", "0"))
+PLOT_LAYER_MS = float(os.getenv("FAKE_PCBNEW_PLOT_MS", "0"))
+
+# Layers
+F_Cu, B_Cu, F_SilkS, B_SilkS, F_Mask, B_Mask, Edge_Cuts = 0, 31, 37, 36, 39, 38, 44
+SHAPE_T_SEGMENT, SHAPE_T_RECT, SHAPE_T_ARC, SHAPE_T_CIRCLE, SHAPE_T_POLY = 0, 1, 2, 3, 4
+PLOT_FORMAT_GERBER = 1
+
+IU_PER_MM = 1000000
+
+# board_file -> BOARD, so LoadBoard returns what SaveBoard stored
+_SAVED = {}
+
+def reset():
+    OPS.clear()
+    _SAVED.clear()
+
+def FromMM(mm):
+    return int(round(mm * IU_PER_MM))
+
+def ToMM(iu):
+    return iu / IU_PER_MM
+
+class wxPoint:
+    def __init__(self, x, y):
+        self.x = int(x)
+        self.y = int(y)
+
+    def __add__(self, other):
+        return wxPoint(self.x + other.x, self.y + other.y)
+
+    def __eq__(self, other):
+        return self.x == other.x and self.y == other.y
+
+    def __repr__(self):
+        return f"wxPoint({self.x}, {self.y})"
+
+VECTOR2I = wxPoint
+
+def wxPointMM(x, y):
+    return wxPoint(FromMM(x), FromMM(y))
+
+class _Item:
+    def __init__(self, board=None):
+        self._layer = F_Cu
+        self._net = None
+
+    def SetLayer(self, layer):
+        self._layer = layer
+
+    def GetLayer(self):
+        return self._layer
+
+    def SetNet(self, net):
+        self._net = net
+
+    def SetNetCode(self, code):
+        if code == 0:  # the unconnected net
+            self._net = None
+
+    def GetNet(self):
+        return self._net
+
+    def GetNetname(self):
+        return self._net.GetNetname() if self._net else ""
+
+class PCB_SHAPE(_Item):
+    def __init__(self, board=None):
+        super().__init__(board)
+        self._shape = SHAPE_T_SEGMENT
+        self._start = wxPoint(0, 0)
+        self._end = wxPoint(0, 0)
+        self._width = 0
+        OPS["shape"] += 1
+
+    def SetShape(self, shape):
+        self._shape = shape
+
+    def GetShape(self):
+        return self._shape
+
+    def SetStart(self, p):
+        self._start = p
+
+    def GetStart(self):
+        return self._start
+
+    def SetEnd(self, p):
+        self._end = p
+
+    def GetEnd(self):
+        return self._end
+
+    def SetCenter(self, p):
+        self._start = p
+
+    def GetCenter(self):
+        return self._start
+
+    def SetWidth(self, w):
+        self._width = w
+
+    def GetWidth(self):
+        return self._width
+
+    def GetRadius(self):
+        return int(((self._end.x - self._start.x) ** 2 + (self._end.y - self._start.y) ** 2) ** 0.5)
+
+class PCB_TRACK(PCB_SHAPE):
+    def __init__(self, board=None):
+        super().__init__(board)
+        OPS["track"] += 1
+
+class _Text:
+    def __init__(self, text=""):
+        self._text = text
+
+    def SetText(self, text):
+        self._text = text
+
+    def GetText(self):
+        return self._text
+
+class _Box:
+    def __init__(self, x, y, w, h):
+        self._x, self._y, self._w, self._h = x, y, w, h
+
+    def GetX(self):
+        return self._x
+
+    def GetY(self):
+        return self._y
+
+    def GetWidth(self):
+        return self._w
+
+    def GetHeight(self):
+        return self._h
+
+class PAD(_Item):
+    def __init__(self, footprint, name, offset, size=(FromMM(1), FromMM(1)), smd=True):
+        super().__init__()
+        self._footprint = footprint
+        self._name = name
+        self._offset = offset
+        self._size = size
+        self._layers = {F_Cu} if smd else {F_Cu, B_Cu}
+
+    def GetName(self):
+        return self._name
+
+    def GetPosition(self):
+        return self._footprint.GetPosition() + self._offset
+
+    def IsOnLayer(self, layer):
+        return layer in self._layers
+
+    def GetBoundingBox(self):
+        p, (w, h) = self.GetPosition(), self._size
+        return _Box(p.x - w // 2, p.y - h // 2, w, h)
+
+class FOOTPRINT(_Item):
+    def __init__(self, fpname, pads):
+        super().__init__()
+        self._fpname = fpname
+        self._reference = _Text("REF**")
+        self._value = _Text(fpname)
+        self._position = wxPoint(0, 0)
+        self._orientation = 0.0
+        self._pads = [PAD(self, *pad) for pad in pads]
+
+    def Reference(self):
+        return self._reference
+
+    def Value(self):
+        return self._value
+
+    def GetReference(self):
+        return self._reference.GetText()
+
+    def GetFPIDAsString(self):
+        return self._fpname
+
+    def SetPosition(self, p):
+        OPS["move"] += 1
+        self._position = p
+
+    def GetPosition(self):
+        return self._position
+
+    def SetOrientationDegrees(self, deg):
+        self._orientation = deg
+
+    def Pads(self):
+        return list(self._pads)
+
+_PAD_RE = re.compile(r'\(pad\s+"?([^"\s)]*)"?\s+(\S+)\s+\S+\s+\(at\s+(-?[\d.]+)\s+(-?[\d.]+)[^)]*\)'
+                     r'(?:\s+\(size\s+([\d.]+)\s+([\d.]+)\))?')
+
+def FootprintLoad(libpath, fpname):
+    OPS["footprint_load"] += 1
+    if FOOTPRINT_LOAD_MS:
+        time.sleep(FOOTPRINT_LOAD_MS / 1000.0)
+    path = os.path.join(libpath, f"{fpname}.kicad_mod")
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+    except OSError:
+        return None
+    pads = [(name, wxPointMM(float(x), float(y)), (FromMM(float(w or 1)), FromMM(float(h or 1))), kind == "smd")
+            for name, kind, x, y, w, h in _PAD_RE.findall(text)]
+    return FOOTPRINT(fpname, pads)
+
+class _NetClass:
+    def SetTrackWidth(self, w):
+        self.track_width = w
+
+class _DesignSettings:
+    def __init__(self):
+        self._default = _NetClass()
+        self.copper_layers = 2
+
+    def GetDefault(self):
+        return self._default
+
+    def SetDefaultClearance(self, c):
+        self.clearance = c
+
+    def SetCopperLayerCount(self, n):
+        self.copper_layers = n
+
+class NETINFO_ITEM:
+    def __init__(self, board, name, code=-1):
+        self._name = name
+        self._code = code
+
+    def GetNetname(self):
+        return self._name
+
+    def GetNetCode(self):
+        return self._code
+
+def _in_ring(x, y, ring):
+    inside = False
+    for (x1, y1), (x2, y2) in zip(ring, ring[1:] + ring[:1]):
+        if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+            inside = not inside
+    return inside
+
+def _near_ring(x, y, ring, dist):
+    for (x1, y1), (x2, y2) in zip(ring, ring[1:] + ring[:1]):
+        dx, dy = x2 - x1, y2 - y1
+        t = ((x - x1) * dx + (y - y1) * dy) / (dx * dx + dy * dy) if dx or dy else 0.0
+        t = min(1.0, max(0.0, t))
+        if (x - x1 - t * dx) ** 2 + (y - y1 - t * dy) ** 2 <= dist * dist:
+            return True
+    return False
+
+class SHAPE_POLY_SET:
+    def __init__(self):
+        self._outlines = []  # [[ring, hole, ...]] of [(x, y)]
+        self._boxes = None   # ring bounding boxes for Contains, dropped on edits
+
+    def NewOutline(self):
+        self._boxes = None
+        self._outlines.append([[]])
+        return len(self._outlines) - 1
+
+    def NewHole(self, outline=-1):
+        self._boxes = None
+        self._outlines[outline].append([])
+        return len(self._outlines[outline]) - 2
+
+    def Append(self, x, y, outline=-1, hole=-1):
+        OPS["poly_point"] += 1
+        self._boxes = None
+        rings = self._outlines[outline]
+        rings[0 if hole < 0 else hole + 1].append((x, y))
+
+    def OutlineCount(self):
+        return len(self._outlines)
+
+    def Contains(self, p, outline=-1, accuracy=0):
+        """Point in the outline (all outlines with -1) and not in its holes, or within accuracy of an edge."""
+        OPS["poly_contains"] += 1
+        if self._boxes is None:
+            self._boxes = [[(min(x for x, _ in r), min(y for _, y in r), max(x for x, _ in r), max(y for _, y in r))
+                            if r else None for r in rings] for rings in self._outlines]
+        x, y = p.x, p.y
+
+        def near(box):
+            return box is not None and box[0] - accuracy <= x <= box[2] + accuracy \
+                and box[1] - accuracy <= y <= box[3] + accuracy
+
+        indices = range(len(self._outlines)) if outline < 0 else [outline]
+        for rings, boxes in ((self._outlines[i], self._boxes[i]) for i in indices):
+            if not near(boxes[0]):
+                continue
+            candidates = [ring for ring, box in zip(rings, boxes) if near(box)]
+            if any(_near_ring(x, y, ring, accuracy) for ring in candidates):
+                return True
+            if _in_ring(x, y, rings[0]) and not any(_in_ring(x, y, hole) for hole in candidates[1:]):
+                return True
+        return False
+
+class ZONE(_Item):
+    def __init__(self, board=None):
+        super().__init__(board)
+        self._outline = SHAPE_POLY_SET()
+        self._fill = {}
+        self._filled = False
+        OPS["zone"] += 1
+
+    def Outline(self):
+        return self._outline
+
+    def SetLocalClearance(self, c):
+        self._clearance = c
+
+    def SetThermalReliefGap(self, gap):
+        self._thermal_gap = gap
+
+    def SetThermalReliefSpokeWidth(self, width):
+        self._spoke_width = width
+
+    def SetFilledPolysList(self, layer, polyset):
+        self._fill[layer] = polyset
+
+    def GetFilledPolysList(self, layer):
+        return self._fill.get(layer, SHAPE_POLY_SET())
+
+    def SetIsFilled(self, filled):
+        self._filled = filled
+
+    def IsFilled(self):
+        return self._filled
+
+class ZONE_FILLER:
+    def __init__(self, board):
+        self._board = board
+
+    def Fill(self, zones, check=False):
+        # Fills the whole outline: clearances and thermal reliefs aren't modelled
+        OPS["zone_filler"] += 1
+        for zone in zones:
+            fill = SHAPE_POLY_SET()
+            fill._outlines = [[list(ring) for ring in rings] for rings in zone.Outline()._outlines]
+            zone.SetFilledPolysList(zone.GetLayer(), fill)
+            zone.SetIsFilled(True)
+        return True
+
+class BOARD:
+    def __init__(self):
+        self._footprints = []
+        self._tracks = []
+        self._drawings = []
+        self._zones = []
+        self._nets = {}
+        self._settings = _DesignSettings()
+        OPS["board"] += 1
+
+    def _bucket(self, item):
+        if isinstance(item, FOOTPRINT):
+            return self._footprints
+        if isinstance(item, PCB_TRACK):
+            return self._tracks
+        if isinstance(item, ZONE):
+            return self._zones
+        return self._drawings
+
+    def FindNet(self, name):
+        return self._nets.get(name)
+
+    def Add(self, item):
+        OPS["add"] += 1
+        if isinstance(item, NETINFO_ITEM):
+            item._code = len(self._nets) + 1
+            self._nets[item.GetNetname()] = item
+            return
+        self._bucket(item).append(item)
+
+    def Remove(self, item):
+        OPS["remove"] += 1
+        self._bucket(item).remove(item)
+
+    def GetFootprints(self):
+        return list(self._footprints)
+
+    def GetTracks(self):
+        return list(self._tracks)
+
+    def GetDrawings(self):
+        return list(self._drawings)
+
+    def Zones(self):
+        return list(self._zones)
+
+    def GetDesignSettings(self):
+        return self._settings
+
+def SaveBoard(path, board):
+    OPS["save"] += 1
+    _SAVED[os.path.abspath(path)] = board
+    summary = {
+        "footprints": len(board._footprints),
+        "tracks": len(board._tracks),
+        "drawings": len(board._drawings),
+        "zones": len(board._zones),
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(summary, f)
+    return True
+
+def LoadBoard(path):
+    OPS["load"] += 1
+    return _SAVED[os.path.abspath(path)]
+
+class _PlotOptions:
+    def __getattr__(self, name):
+        if name.startswith("Set"):
+            return lambda *args: None
+        raise AttributeError(name)
+
+class PLOT_CONTROLLER:
+    def __init__(self, board):
+        self._board = board
+        self._options = _PlotOptions()
+        self._layer = None
+
+    def GetPlotOptions(self):
+        return self._options
+
+    def SetLayer(self, layer):
+        self._layer = layer
+
+    def OpenPlotfile(self, suffix, fmt, sheet):
+        OPS["plot_open"] += 1
+
+    def PlotLayer(self):
+        OPS["plot_layer"] += 1
+        if PLOT_LAYER_MS:
+            time.sleep(PLOT_LAYER_MS / 1000.0)
+
+    def ClosePlot(self):
+        pass
@@ -0,0 +1,208 @@
+# End-to-end pipeline benchmark with local stand-ins for arduino-cli, the model and pcbnew.
+#
+#   cd backend
+#   python -m bench.run                   # run and compare against bench/baseline.json
+#   python -m bench.run --save-baseline   # store this run as the new baseline
+#   python -m bench.run --stages compile,pcb --compile-ms 50 --repeat 5
+#
+# Exits with status 1 when a stage regressed by more than --tolerance.
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+BASELINE_FILE = os.path.join(BENCH_DIR, "baseline.json")
+
+# The fake pcbnew must win over a real one for the generators to be comparable
+sys.path.insert(0, os.path.join(BENCH_DIR, "fake_pcbnew"))
+sys.path.insert(1, BACKEND_DIR)
+
+from bench import corpus
+from bench.fake_arduino_cli import install_fake_cli
+from bench.fake_llm import FakeChatModel
+
+STAGES = ("compile", "analyze", "pcb")
+
+def _timed(fn, *args, **kwargs):
+    """Run fn quietly (the pipeline prints a lot) and return (result, seconds)."""
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def bench_compile(workdir, args):
+    import compile as compile_module
+    from scheduler import SCHEDULER
+    # Start every run from the priors, and don't touch the server's learned costs
+    SCHEDULER.costs_file = os.path.join(workdir, "compile_costs.json")
+    SCHEDULER.costs = {}
+    compile_module.ARDUINO_CLI = install_fake_cli(
+        workdir, listall_ms=args.listall_ms, lib_ms=args.lib_ms, compile_ms=args.compile_ms
+    )
+
+    samples = {}
+    for name, code in corpus.sketches():
+        path = os.path.join(workdir, f"{name}.ino")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(code)
+        for _ in range(args.repeat):
+            (status, chip, _logs), secs = _timed(compile_module.compile_ino, path)
+            samples.setdefault(f"compile/{name}", []).append(secs)
+    return samples
+
+def bench_analyze(workdir, args):
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    import openai_agent
+    openai_agent.llm = FakeChatModel(latency_ms=args.llm_ms, ms_per_token=args.llm_ms_per_token, invalid_every=4)
+
+    samples = {}
+    for name, code in corpus.sketches():
+        path = os.path.join(workdir, f"{name}.ino")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(code)
+        for _ in range(args.repeat):
+            _, secs = _timed(openai_agent.analyze_code, path, "arduino:avr:uno")
+            samples.setdefault(f"analyze/{name}", []).append(secs)
+    return samples
+
+def bench_pcb(workdir, args):
+    import pcbnew
+    import pcbgenfull
+
+    lib_root = corpus.write_footprint_library(os.path.join(workdir, "footprints"))
+    samples = {}
+    ops = {}
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        for name, pcb_json in corpus.designs(lib_root):
+            for _ in range(args.repeat):
+                pcbnew.reset()
+                pcbgenfull.LAST_BOARDS.clear()
+                _, secs = _timed(pcbgenfull.generate_pcb, pcb_json, name)
+                samples.setdefault(f"pcb_full/{name}", []).append(secs)
+                ops[f"pcb_full/{name}"] = dict(pcbnew.OPS)
+
+                pcbnew.OPS.clear()
+                edited = corpus.one_component_edit(pcb_json)
+                _, secs = _timed(pcbgenfull.generate_pcb, edited, name, incremental=True)
+                samples.setdefault(f"pcb_incremental/{name}", []).append(secs)
+                ops[f"pcb_incremental/{name}"] = dict(pcbnew.OPS)
+    finally:
+        os.chdir(cwd)
+
+    if args.verbose:
+        for key, counts in ops.items():
+            print(f"   {key}: {counts}")
+    return samples
+
+def summarize(samples):
+    """{key: {"n", "mean_ms", "p95_ms"}} plus per-stage throughput."""
+    rows = {}
+    for key, secs in samples.items():
+        ordered = sorted(secs)
+        rows[key] = {
+            "n": len(ordered),
+            "mean_ms": statistics.mean(ordered) * 1000,
+            "p95_ms": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] * 1000,
+        }
+    stages = {}
+    for key, secs in samples.items():
+        stage = key.split("/")[0]
+        total = stages.setdefault(stage, [0, 0.0])
+        total[0] += len(secs)
+        total[1] += sum(secs)
+    throughput = {stage: n / secs if secs else 0.0 for stage, (n, secs) in stages.items()}
+    return rows, throughput
+
+def compare(rows, baseline, tolerance, floor_ms):
+    """Keys whose mean got slower than baseline by more than tolerance (and floor_ms)."""
+    regressions = []
+    for key, row in rows.items():
+        old = baseline.get(key)
+        if old is None:
+            continue
+        if row["mean_ms"] > old["mean_ms"] * (1 + tolerance) and row["mean_ms"] - old["mean_ms"] > floor_ms:
+            regressions.append((key, old["mean_ms"], row["mean_ms"]))
+    return regressions
+
+def report(rows, throughput, baseline):
+    print(f"{'stage/item':<34}{'n':>4}{'mean ms':>11}{'p95 ms':>11}{'baseline':>11}{'delta':>9}")
+    for key in sorted(rows):
+        row = rows[key]
+        old = baseline.get(key)
+        base = f"{old['mean_ms']:.1f}" if old else "-"
+        delta = f"{(row['mean_ms'] / old['mean_ms'] - 1) * 100:+.0f}%" if old and old["mean_ms"] else "-"
+        print(f"{key:<34}{row['n']:>4}{row['mean_ms']:>11.1f}{row['p95_ms']:>11.1f}{base:>11}{delta:>9}")
+    print()
+    for stage, rate in sorted(throughput.items()):
+        print(f"{stage:<20} {rate:8.1f} items/s")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark compile -> analyze -> pcb with local stand-ins")
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"comma separated subset of {STAGES}")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--listall-ms", type=float, default=5)
+    parser.add_argument("--lib-ms", type=float, default=5)
+    parser.add_argument("--compile-ms", type=float, default=20)
+    parser.add_argument("--llm-ms", type=float, default=20)
+    parser.add_argument("--llm-ms-per-token", type=float, default=0.0)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%")
+    parser.add_argument("--floor-ms", type=float, default=2.0, help="ignore slowdowns smaller than this")
+    parser.add_argument("-v", "--verbose", action="store_true", help="print fake pcbnew operation counts")
+    args = parser.parse_args(argv)
+
+    runners = {"compile": bench_compile, "analyze": bench_analyze, "pcb": bench_pcb}
+    samples = {}
+    failed = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for stage in [s.strip() for s in args.stages.split(",") if s.strip()]:
+            print(f"⏱️ {stage} ...")
+            try:
+                samples.update(runners[stage](workdir, args))
+            except ImportError as e:
+                # The stand-ins exist so no stage needs the real toolchain; a missing import is a bug
+                print(f"❌ {stage} failed: {e}")
+                failed.append(stage)
+
+    rows, throughput = summarize(samples)
+
+    baseline = {}
+    if os.path.isfile(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    report(rows, throughput, baseline)
+
+    if failed:
+        print(f"❌ Stages failed: {', '.join(failed)}")
+        return 1
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2, sort_keys=True)
+        print(f"✅ Baseline written to {args.baseline}")
+        return 0
+
+    if not baseline:
+        print("ℹ️ No baseline yet, run with --save-baseline to store one")
+        return 0
+
+    regressions = compare(rows, baseline, args.tolerance, args.floor_ms)
+    for key, old, new in regressions:
+        print(f"❌ Regression in {key}: {old:.1f} ms -> {new:.1f} ms")
+    if not regressions:
+        print("✅ No regressions against baseline")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,6 +3,25 @@ import re
 import subprocess
 import tempfile
 import shutil
+import asyncio
+import time
+
+from tracing import span
+from scheduler import SCHEDULER, SchedulerBusy
+
+# arduino-cli executable (override to point at a different install or a stub)
+ARDUINO_CLI = os.getenv("ARDUINO_CLI", "arduino-cli")
+
+# Wall-clock limit for a single arduino-cli call in the async path (seconds)
+COMMAND_TIMEOUT = float(os.getenv("ARDUINO_CLI_TIMEOUT", "300"))
+
+# How long a `board listall` result is reused (seconds)
+BOARD_LIST_TTL = float(os.getenv("BOARD_LIST_TTL", "600"))
+
+# Process-wide caches, also primed by warmup.py
+RESOLVED_LIBS = {}      # include -> library name from `lib search` (None: no match)
+INSTALLED_LIBS = set()  # library names installed by this process
+_board_cache = (0.0, [])  # (time fetched, fqbns)
 
 # Priority list of common boards (cheap & widely used) by FQBN
 PRIORITY_BOARDS = [
@@ -20,50 +39,102 @@ PRIORITY_BOARDS = [
     "esp32:esp32:node32s",            # NodeMCU-32S
 ]
 
-def install_missing_libs(ino_path):
-    """Parse .ino file and auto-install missing libraries using arduino-cli."""
-    with open(ino_path, "r") as f:
-        code = f.read()
+def _parse_includes(code):
+    return re.findall(r'#include\s*<([^>]+)>', code)
 
-    includes = re.findall(r'#include\s*<([^>]+)>', code)
-    for lib in includes:
-        print(f"🔍 Checking library: {lib}")
+def _parse_lib_name(search_output):
+    """First library name in `arduino-cli lib search` output."""
+    for line in search_output.splitlines():
+        if line.startswith("Name:"):
+            return line.replace("Name:", "").strip()
+    return None
+
+def _parse_fqbns(listall_output):
+    """FQBNs (last column) from `arduino-cli board listall` output."""
+    fqbn_list = []
+    for line in listall_output.splitlines():
+        parts = line.split()
+        if len(parts) >= 2 and ":" in parts[-1]:
+            fqbn_list.append(parts[-1])
+    return fqbn_list
+
+def resolve_library(lib):
+    """Library name `arduino-cli lib search` finds for an include (cached)."""
+    if lib in RESOLVED_LIBS:
+        return RESOLVED_LIBS[lib]
+    print(f"🔍 Checking library: {lib}")
+    with span("compile.lib_search", lib=lib):
         result = subprocess.run(
-            ["arduino-cli", "lib", "search", lib],
+            [ARDUINO_CLI, "lib", "search", lib],
             capture_output=True,
             text=True
         )
-        if "Name:" in result.stdout:
-            lib_name = None
-            for line in result.stdout.splitlines():
-                if line.startswith("Name:"):
-                    lib_name = line.replace("Name:", "").strip()
-                    break
-            if lib_name:
-                print(f"📦 Installing {lib_name} ...")
-                subprocess.run(["arduino-cli", "lib", "install", lib_name])
-        else:
+    lib_name = _parse_lib_name(result.stdout) if "Name:" in result.stdout else None
+    if result.returncode == 0:
+        RESOLVED_LIBS[lib] = lib_name
+    return lib_name
+
+def install_missing_libs(ino_path):
+    """Parse .ino file and auto-install missing libraries using arduino-cli."""
+    with open(ino_path, "r") as f:
+        code = f.read()
+
+    for lib in _parse_includes(code):
+        lib_name = resolve_library(lib)
+        if not lib_name:
             print(f"⚠️ No match found for {lib}")
+        elif lib_name not in INSTALLED_LIBS:
+            print(f"📦 Installing {lib_name} ...")
+            with span("compile.lib_install", lib=lib_name):
+                result = subprocess.run([ARDUINO_CLI, "lib", "install", lib_name])
+            if result.returncode == 0:
+                INSTALLED_LIBS.add(lib_name)
+
+def _cached_boards():
+    fetched, boards = _board_cache
+    if boards and time.monotonic() - fetched < BOARD_LIST_TTL:
+        return boards
+    return None
 
-def get_installed_boards():
-    """Get all installed board FQBNs dynamically using arduino-cli."""
+def get_installed_boards(refresh=False):
+    """Get all installed board FQBNs dynamically using arduino-cli (cached for BOARD_LIST_TTL)."""
+    global _board_cache
+    if not refresh and _cached_boards():
+        return _cached_boards()
     try:
-        result = subprocess.run(
-            ["arduino-cli", "board", "listall"],
-            capture_output=True, text=True, check=True
-        )
-        lines = result.stdout.splitlines()
-        fqbn_list = []
-        for line in lines:
-            parts = line.split()
-            if len(parts) >= 2 and ":" in parts[-1]:
-                fqbn_list.append(parts[-1])
-        return fqbn_list
+        with span("compile.board_list"):
+            result = subprocess.run(
+                [ARDUINO_CLI, "board", "listall"],
+                capture_output=True, text=True, check=True
+            )
+        boards = _parse_fqbns(result.stdout)
+        _board_cache = (time.monotonic(), boards)
+        return boards
     except Exception as e:
         return []
 
-def compile_ino(ino_file):
-    """Prepare Arduino structure, auto-install libs, and try compiling with priority first."""
+WARMUP_SKETCH = "void setup() {}\nvoid loop() {}\n"
+
+def warm_core(fqbn):
+    """Compile an empty sketch so arduino-cli builds and caches the board's core."""
+    temp_dir = tempfile.mkdtemp()
+    try:
+        sketch_dir = os.path.join(temp_dir, "warmup")
+        os.makedirs(sketch_dir)
+        with open(os.path.join(sketch_dir, "warmup.ino"), "w") as f:
+            f.write(WARMUP_SKETCH)
+        cmd = [ARDUINO_CLI, "compile", "--fqbn", fqbn, sketch_dir]
+        return SCHEDULER.run(cmd, fqbn, "warmup").returncode == 0
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+def compile_ino(ino_file, client=None):
+    """
+    Prepare Arduino structure, auto-install libs, and try compiling with priority first.
+    Compile attempts go through the shared scheduler; `client` (e.g. the upload hash)
+    is what it shares resources fairly between.
+    """
+    client = client or ino_file
     sketch_name = os.path.splitext(os.path.basename(ino_file))[0]
 
     # make temporary sketch folder
@@ -86,8 +157,14 @@ def compile_ino(ino_file):
     for fqbn in PRIORITY_BOARDS:
         if fqbn in boards:
             print(f"⚡ Trying priority board: {fqbn}")
-            cmd = ["arduino-cli", "compile", "--fqbn", fqbn, sketch_dir]
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            cmd = [ARDUINO_CLI, "compile", "--fqbn", fqbn, sketch_dir]
+            try:
+                with span("compile.fqbn", fqbn=fqbn) as s:
+                    result = SCHEDULER.run(cmd, fqbn, client)
+                    s["ok"] = result.returncode == 0
+            except SchedulerBusy:
+                shutil.rmtree(temp_dir)
+                return "failed", None, "❌ Compile queue is full, try again later."
             if result.returncode == 0:
                 output = result.stdout + "\n" + result.stderr
                 shutil.rmtree(temp_dir)
@@ -97,8 +174,14 @@ def compile_ino(ino_file):
     for fqbn in boards:
         if fqbn not in PRIORITY_BOARDS:  # skip already tried
             print(f"⚡ Trying fallback board: {fqbn}")
-            cmd = ["arduino-cli", "compile", "--fqbn", fqbn, sketch_dir]
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            cmd = [ARDUINO_CLI, "compile", "--fqbn", fqbn, sketch_dir]
+            try:
+                with span("compile.fqbn", fqbn=fqbn) as s:
+                    result = SCHEDULER.run(cmd, fqbn, client)
+                    s["ok"] = result.returncode == 0
+            except SchedulerBusy:
+                shutil.rmtree(temp_dir)
+                return "failed", None, "❌ Compile queue is full, try again later."
             if result.returncode == 0:
                 output = result.stdout + "\n" + result.stderr
                 shutil.rmtree(temp_dir)
@@ -108,3 +191,129 @@ def compile_ino(ino_file):
     output = result.stdout + "\n" + result.stderr
     shutil.rmtree(temp_dir)
     return "failed", None, "❌ Compilation failed for all boards.\n" + output
+
+# ---------------------------------------------------------------------------
+# Async variants (used by the ASGI server in asgi.py)
+# ---------------------------------------------------------------------------
+
+async def _run_async(cmd, timeout=None):
+    """
+    Run a command without blocking the event loop.
+    The process is killed on timeout and when the awaiting task is cancelled
+    (e.g. the client disconnected). Returns a subprocess.CompletedProcess.
+    """
+    proc = await asyncio.create_subprocess_exec(
+        *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout or COMMAND_TIMEOUT)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        return subprocess.CompletedProcess(cmd, -1, "", f"⏱️ Timed out after {timeout or COMMAND_TIMEOUT}s")
+    except asyncio.CancelledError:
+        proc.kill()
+        await proc.wait()
+        raise
+    return subprocess.CompletedProcess(
+        cmd, proc.returncode,
+        stdout.decode(errors="replace"), stderr.decode(errors="replace")
+    )
+
+async def _resolve_and_install_async(lib):
+    if lib in RESOLVED_LIBS:
+        lib_name = RESOLVED_LIBS[lib]
+    else:
+        print(f"🔍 Checking library: {lib}")
+        with span("compile.lib_search", lib=lib):
+            result = await _run_async([ARDUINO_CLI, "lib", "search", lib])
+        lib_name = _parse_lib_name(result.stdout) if "Name:" in result.stdout else None
+        if result.returncode == 0:
+            RESOLVED_LIBS[lib] = lib_name
+    if not lib_name:
+        print(f"⚠️ No match found for {lib}")
+    elif lib_name not in INSTALLED_LIBS:
+        print(f"📦 Installing {lib_name} ...")
+        with span("compile.lib_install", lib=lib_name):
+            result = await _run_async([ARDUINO_CLI, "lib", "install", lib_name])
+        if result.returncode == 0:
+            INSTALLED_LIBS.add(lib_name)
+    return lib_name
+
+async def install_missing_libs_async(ino_path, lib_cache=None):
+    """
+    Async install_missing_libs.
+    `lib_cache` ({include: Task}) lets several sketches share one search/install per library.
+    """
+    with open(ino_path, "r") as f:
+        code = f.read()
+
+    for lib in _parse_includes(code):
+        if lib_cache is None:
+            await _resolve_and_install_async(lib)
+            continue
+        task = lib_cache.get(lib)
+        if task is None:
+            task = lib_cache[lib] = asyncio.ensure_future(_resolve_and_install_async(lib))
+        # shield: one sketch being cancelled must not cancel an install others wait on
+        await asyncio.shield(task)
+
+async def get_installed_boards_async(refresh=False):
+    """Async get_installed_boards (shares its cache)."""
+    global _board_cache
+    if not refresh and _cached_boards():
+        return _cached_boards()
+    try:
+        with span("compile.board_list"):
+            result = await _run_async([ARDUINO_CLI, "board", "listall"])
+    except OSError:
+        return []
+    if result.returncode != 0:
+        return []
+    boards = _parse_fqbns(result.stdout)
+    _board_cache = (time.monotonic(), boards)
+    return boards
+
+async def compile_ino_async(ino_file, client=None, boards=None, lib_cache=None):
+    """
+    Async compile_ino: same board order and scheduler.
+    Batches pass a pre-fetched `boards` list and a shared `lib_cache`.
+    """
+    client = client or ino_file
+    sketch_name = os.path.splitext(os.path.basename(ino_file))[0]
+
+    temp_dir = tempfile.mkdtemp()
+    try:
+        sketch_dir = os.path.join(temp_dir, sketch_name)
+        os.makedirs(sketch_dir, exist_ok=True)
+        sketch_path = os.path.join(sketch_dir, f"{sketch_name}.ino")
+        shutil.copy(ino_file, sketch_path)
+
+        await install_missing_libs_async(sketch_path, lib_cache)
+
+        if boards is None:
+            boards = await get_installed_boards_async()
+        if not boards:
+            return "failed", None, "❌ No boards installed."
+
+        # Priority boards first, then the remaining installed ones
+        candidates = [b for b in PRIORITY_BOARDS if b in boards]
+        candidates += [b for b in boards if b not in PRIORITY_BOARDS]
+
+        output = ""
+        for fqbn in candidates:
+            print(f"⚡ Trying board: {fqbn}")
+            cmd = [ARDUINO_CLI, "compile", "--fqbn", fqbn, sketch_dir]
+            try:
+                with span("compile.fqbn", fqbn=fqbn) as s:
+                    result = await SCHEDULER.run_async(cmd, fqbn, client)
+                    s["ok"] = result.returncode == 0
+            except SchedulerBusy:
+                return "failed", None, "❌ Compile queue is full, try again later."
+            output = result.stdout + "\n" + result.stderr
+            if result.returncode == 0:
+                return "success", fqbn, output
+
+        return "failed", None, "❌ Compilation failed for all boards.\n" + output
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
@@ -0,0 +1,283 @@
+# Footprint metadata straight from .kicad_mod files, no pcbnew needed.
+#
+# A small streaming S-expression scanner reads each file once and keeps only
+# what footprint selection needs: pad names, through-hole vs SMD, courtyard
+# size, tags and description. Results are held per .pretty directory in a
+# columnar table and cached on disk (FOOTPRINT_META_CACHE), keyed by each
+# directory's file names and their mtimes, so only changed libraries (edited,
+# added, removed or renamed footprints) are rescanned.
+# Stale libraries are scanned in parallel worker processes.
+
+import os
+import re
+import json
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from tracing import span
+
+CACHE_FILE = os.getenv("FOOTPRINT_META_CACHE", "footprint_meta.json")
+WORKERS = int(os.getenv("FOOTPRINT_INDEX_WORKERS", str(os.cpu_count() or 1)))
+CACHE_VERSION = 2  # 2: signature includes the file names
+
+# Columns stored per library (and in the cache file), one entry per footprint
+COLUMNS = ("name", "pads", "tht", "width", "height", "tags", "descr")
+PAD_SEP = "\t"
+
+# ---------------------------------------------------------------------------
+# S-expression scanner
+# ---------------------------------------------------------------------------
+
+# "(", ")", a quoted string (quotes kept, so it never equals a paren) or an atom
+_TOKEN_RE = re.compile(r'\(|\)|"(?:[^"\\]|\\.)*"|[^\s()"]+')
+
+# Top-level children of (footprint ...) worth materializing; everything else is skipped
+_WANTED = {"descr", "tags", "attr", "pad", "fp_line", "fp_rect", "fp_circle", "fp_arc", "fp_poly"}
+_COURTYARD_LAYERS = {"F.CrtYd", "B.CrtYd"}
+
+def _unquote(tok):
+    if tok[:1] != '"':
+        return tok
+    s = tok[1:-1]
+    return s.replace('\\"', '"').replace("\\\\", "\\") if "\\" in s else s
+
+def _read_list(tokens):
+    """Rest of a list whose "(" was already consumed, as nested python lists."""
+    out = []
+    for tok in tokens:
+        if tok == "(":
+            out.append(_read_list(tokens))
+        elif tok == ")":
+            return out
+        else:
+            out.append(_unquote(tok))
+    return out
+
+def _skip_list(tokens):
+    depth = 1
+    for tok in tokens:
+        if tok == "(":
+            depth += 1
+        elif tok == ")":
+            depth -= 1
+            if not depth:
+                return
+
+def _children(text):
+    """Yield the wanted top-level children of the root (footprint ...) / (module ...) list."""
+    tokens = iter(_TOKEN_RE.findall(text))
+    if next(tokens, None) != "(":
+        return
+    for tok in tokens:
+        if tok == ")":
+            return
+        if tok != "(":
+            continue  # root head, name, flags like `locked`
+        head = next(tokens, None)
+        if head in _WANTED:
+            yield [head] + _read_list(tokens)
+        else:
+            _skip_list(tokens)
+
+def _field(node, key):
+    for item in node:
+        if isinstance(item, list) and item and item[0] == key:
+            return item
+    return None
+
+def _points(node):
+    """Coordinates of a graphic item (start/end/mid/center or pts/xy)."""
+    points = []
+    for item in node:
+        if not isinstance(item, list) or not item:
+            continue
+        if item[0] in ("start", "end", "mid", "center") and len(item) >= 3:
+            points.append((float(item[1]), float(item[2])))
+        elif item[0] == "pts":
+            points.extend((float(xy[1]), float(xy[2])) for xy in item[1:]
+                          if isinstance(xy, list) and xy[0] == "xy")
+    return points
+
+def scan_footprint(path):
+    """
+    Metadata of one .kicad_mod file:
+    (pad names, through-hole?, courtyard width mm, courtyard height mm, tags, descr)
+    The size falls back to the pad extents when there's no courtyard.
+    """
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        text = f.read()
+
+    pads, attr, tags, descr = {}, None, "", ""
+    tht_pad = False
+    court, pad_extent = [], []
+    for node in _children(text):
+        head = node[0]
+        if head == "pad":
+            if len(node) > 2:
+                if node[1]:
+                    pads[node[1]] = None
+                tht_pad |= node[2] == "thru_hole"
+            at, size = _field(node, "at"), _field(node, "size")
+            if at and size and len(size) >= 3:
+                x, y, w, h = float(at[1]), float(at[2]), float(size[1]), float(size[2])
+                pad_extent += [(x - w / 2, y - h / 2), (x + w / 2, y + h / 2)]
+        elif head == "descr" and len(node) > 1:
+            descr = node[1]
+        elif head == "tags" and len(node) > 1:
+            tags = node[1]
+        elif head == "attr" and len(node) > 1:
+            attr = node[1]
+        else:
+            layer = _field(node, "layer")
+            if not layer or len(layer) < 2 or layer[1] not in _COURTYARD_LAYERS:
+                continue
+            points = _points(node)
+            if head == "fp_circle" and len(points) >= 2:
+                (cx, cy), (ex, ey) = points[0], points[1]
+                r = ((ex - cx) ** 2 + (ey - cy) ** 2) ** 0.5
+                points = [(cx - r, cy - r), (cx + r, cy + r)]
+            court += points
+
+    extent = court or pad_extent
+    if extent:
+        xs, ys = [p[0] for p in extent], [p[1] for p in extent]
+        width, height = max(xs) - min(xs), max(ys) - min(ys)
+    else:
+        width = height = 0.0
+    tht = attr == "through_hole" if attr in ("smd", "through_hole") else tht_pad
+    return list(pads), tht, round(width, 3), round(height, 3), tags, descr
+
+def scan_library(libdir):
+    """Scan every .kicad_mod in a .pretty dir into columns (see COLUMNS)."""
+    columns = {c: [] for c in COLUMNS}
+    for entry in sorted(os.scandir(libdir), key=lambda e: e.name):
+        if not entry.name.endswith(".kicad_mod"):
+            continue
+        try:
+            pads, tht, width, height, tags, descr = scan_footprint(entry.path)
+        except (OSError, ValueError, IndexError) as e:
+            print(f"⚠️ Could not read {entry.path}: {e}")
+            pads, tht, width, height, tags, descr = [], False, 0.0, 0.0, "", ""
+        columns["name"].append(entry.name[:-len(".kicad_mod")])
+        columns["pads"].append(PAD_SEP.join(pads))
+        columns["tht"].append(int(tht))
+        columns["width"].append(width)
+        columns["height"].append(height)
+        columns["tags"].append(tags)
+        columns["descr"].append(descr)
+    return columns
+
+# ---------------------------------------------------------------------------
+# Columnar table
+# ---------------------------------------------------------------------------
+
+class FootprintTable:
+    """
+    All indexed footprints, one column per field; row i is one .kicad_mod.
+    Numeric columns are arrays, pad names are one tab-joined string per row.
+    """
+
+    def __init__(self):
+        self.name, self.libdir, self.pads, self.tags, self.descr = [], [], [], [], []
+        self.tht = array("b")
+        self.width = array("d")
+        self.height = array("d")
+        self.rows_by_name = {}
+
+    def __len__(self):
+        return len(self.name)
+
+    def extend(self, libdir, columns):
+        start = len(self.name)
+        self.name.extend(columns["name"])
+        self.libdir.extend([libdir] * len(columns["name"]))
+        self.pads.extend(columns["pads"])
+        self.tht.extend(columns["tht"])
+        self.width.extend(columns["width"])
+        self.height.extend(columns["height"])
+        self.tags.extend(columns["tags"])
+        self.descr.extend(columns["descr"])
+        for i, name in enumerate(columns["name"], start):
+            self.rows_by_name.setdefault(name, []).append(i)
+
+    def pad_names(self, row):
+        pads = self.pads[row]
+        return set(pads.split(PAD_SEP)) if pads else set()
+
+    def fits(self, row, required=(), max_size=None):
+        """
+        True when the footprint has a pad for every required pin and its
+        courtyard fits max_size (width, height) in either orientation.
+        `required` is a list of sets of acceptable pad names, one per pin.
+        """
+        if max_size:
+            w, h = self.width[row], self.height[row]
+            mw, mh = max_size
+            if not ((w <= mw and h <= mh) or (h <= mw and w <= mh)):
+                return False
+        if required:
+            pads = self.pad_names(row)
+            return all(names & pads for names in required)
+        return True
+
+# ---------------------------------------------------------------------------
+# Cache + parallel indexing
+# ---------------------------------------------------------------------------
+
+_LIBS = None  # {libdir: {"sig": [...], "columns": {...}}}, mirrors CACHE_FILE
+
+def _signature(libdir):
+    """Changes whenever a footprint in libdir is added, removed, renamed or edited."""
+    return sorted([entry.name, entry.stat().st_mtime_ns] for entry in os.scandir(libdir)
+                  if entry.name.endswith(".kicad_mod"))
+
+def _load_cache():
+    global _LIBS
+    if _LIBS is None:
+        try:
+            with open(CACHE_FILE, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            _LIBS = data["libs"] if data.get("version") == CACHE_VERSION else {}
+        except (OSError, ValueError, KeyError):
+            _LIBS = {}
+    return _LIBS
+
+def _save_cache(libs):
+    if not CACHE_FILE:
+        return
+    tmp_path = f"{CACHE_FILE}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "libs": libs}, f)
+        os.replace(tmp_path, CACHE_FILE)
+    except OSError as e:
+        print(f"⚠️ Could not write footprint cache {CACHE_FILE}: {e}")
+
+def _scan_all(libdirs):
+    """{libdir: columns}, in worker processes when there's more than one library."""
+    if WORKERS > 1 and len(libdirs) > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=min(WORKERS, len(libdirs))) as pool:
+                return dict(zip(libdirs, pool.map(scan_library, libdirs)))
+        except (OSError, RuntimeError) as e:  # no fork/spawn here (embedded python, sandbox)
+            print(f"⚠️ Parallel footprint scan failed ({e}), scanning in-process")
+    return {libdir: scan_library(libdir) for libdir in libdirs}
+
+def index_libraries(pretty_dirs):
+    """FootprintTable for these .pretty dirs, rescanning only the ones that changed."""
+    libs = _load_cache()
+    sigs = {libdir: _signature(libdir) for libdir in pretty_dirs}
+    stale = [libdir for libdir in pretty_dirs
+             if libs.get(libdir, {}).get("sig") != sigs[libdir]]
+
+    if stale:
+        with span("pcb.footprint_scan", libraries=len(stale)):
+            for libdir, columns in _scan_all(stale).items():
+                libs[libdir] = {"sig": sigs[libdir], "columns": columns}
+        _save_cache(libs)
+        print(f"📚 Scanned {len(stale)} footprint libraries ({len(pretty_dirs) - len(stale)} cached)")
+
+    table = FootprintTable()
+    for libdir in pretty_dirs:
+        table.extend(libdir, libs[libdir]["columns"])
+    return table
@@ -0,0 +1,115 @@
+# Load test for the upload endpoint against a stubbed arduino-cli and model.
+#
+#   python loadtest.py                      # ASGI server (asgi.py)
+#   python loadtest.py --flask              # threaded Flask server (app.py), for comparison
+#   python loadtest.py -n 500 -c 50 --compile-ms 200 --llm-ms 300
+#
+# Every request uploads a unique sketch so the result cache never short-circuits it.
+# Needs hypercorn and httpx on top of the app's own requirements.
+
+import argparse
+import asyncio
+import os
+import tempfile
+import threading
+import time
+
+from bench.fake_arduino_cli import install_fake_cli
+from bench.fake_llm import FakeChatModel
+
+def install_stubs(workdir, compile_ms, llm_ms):
+    """Point compile.py at the fake arduino-cli and openai_agent.py at the fake model."""
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+    os.environ["WARMUP"] = "0"
+    import compile as compile_module
+    import openai_agent
+    import sketch_store
+
+    compile_module.ARDUINO_CLI = install_fake_cli(workdir, compile_ms=compile_ms)
+    openai_agent.llm = FakeChatModel(latency_ms=llm_ms)
+    sketch_store.UPLOAD_DIR = os.path.join(workdir, "uploads")
+    os.makedirs(sketch_store.UPLOAD_DIR, exist_ok=True)
+
+def _sketch(i):
+    return f"// request {i}\n#include <Servo.h>\nvoid setup() {{}}\nvoid loop() {{}}\n".encode()
+
+async def run_clients(base_url, requests, concurrency):
+    import httpx
+
+    latencies = []
+    failures = 0
+    counter = iter(range(requests))
+
+    async def worker(client):
+        nonlocal failures
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                r = await client.post("/upload", files={"file": ("sketch.ino", _sketch(i))})
+                if r.status_code != 200:
+                    failures += 1
+            except httpx.HTTPError:
+                failures += 1
+            latencies.append(time.perf_counter() - start)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return latencies, failures, elapsed
+
+def report(latencies, failures, elapsed):
+    latencies.sort()
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+    print(f"requests: {len(latencies)}  failures: {failures}  wall: {elapsed:.2f}s")
+    print(f"throughput: {len(latencies) / elapsed:.1f} req/s")
+    print(f"latency p50: {pct(0.50):.0f} ms  p95: {pct(0.95):.0f} ms  max: {latencies[-1] * 1000:.0f} ms")
+
+async def bench_asgi(port, requests, concurrency):
+    from hypercorn.asyncio import serve
+    from hypercorn.config import Config
+    from asgi import app
+
+    config = Config()
+    config.bind = [f"127.0.0.1:{port}"]
+    config.accesslog = None
+    shutdown = asyncio.Event()
+    server = asyncio.create_task(serve(app, config, shutdown_trigger=shutdown.wait))
+    await asyncio.sleep(0.5)
+    try:
+        return await run_clients(f"http://127.0.0.1:{port}", requests, concurrency)
+    finally:
+        shutdown.set()
+        await server
+
+def bench_flask(port, requests, concurrency):
+    from werkzeug.serving import make_server
+    from app import app
+
+    server = make_server("127.0.0.1", port, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        return asyncio.run(run_clients(f"http://127.0.0.1:{port}", requests, concurrency))
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test /upload with stubbed toolchain and model")
+    parser.add_argument("-n", "--requests", type=int, default=200)
+    parser.add_argument("-c", "--concurrency", type=int, default=32)
+    parser.add_argument("--compile-ms", type=float, default=100)
+    parser.add_argument("--llm-ms", type=float, default=200)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--flask", action="store_true", help="benchmark the sync Flask app instead")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        install_stubs(workdir, args.compile_ms, args.llm_ms)
+        if args.flask:
+            result = bench_flask(args.port, args.requests, args.concurrency)
+        else:
+            result = asyncio.run(bench_asgi(args.port, args.requests, args.concurrency))
+    report(*result)
@@ -1,3 +1,5 @@
+# Legacy compile-only server, kept for reference; it is synchronous and does
+# not share uploads or results. Use asgi.py (async) or app.py instead.
 from flask import Flask, request, jsonify, send_from_directory
 import os
 import shutil
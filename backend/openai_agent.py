@@ -1,19 +1,38 @@
 import os
 import json
-from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
-from langchain.schema import SystemMessage, HumanMessage
+import threading
 
-# Load OpenAI key from .env
-load_dotenv()
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+from tracing import span, count
 
-# Initialize LangChain OpenAI client
-llm = ChatOpenAI(
-    model="gpt-4o-mini",  # fast + accurate
-    temperature=0.2,
-    api_key=OPENAI_API_KEY
-)
+# LangChain and dotenv are imported on first use: they are slow to import and
+# the server should boot (and report readiness) without paying for them.
+# Tests and benchmarks may assign their own model to `llm`.
+llm = None
+_llm_lock = threading.Lock()
+_env_loaded = False
+
+def openai_api_key():
+    """OPENAI_API_KEY from the environment or .env (loaded once)."""
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
+    return os.getenv("OPENAI_API_KEY")
+
+def get_llm():
+    """The shared LangChain OpenAI client, created on first use."""
+    global llm
+    if llm is None:
+        with _llm_lock:
+            if llm is None:
+                from langchain_openai import ChatOpenAI
+                llm = ChatOpenAI(
+                    model="gpt-4o-mini",  # fast + accurate
+                    temperature=0.2,
+                    api_key=openai_api_key()
+                )
+    return llm
 
 SYSTEM_PROMPT = """
 You are an expert embedded systems and PCB design assistant.
@@ -36,6 +55,47 @@ Output MUST strictly follow this schema:
 }
 """
 
+# (role, content) pairs: every LangChain chat model accepts them, and they need
+# no langchain import (so stand-in models work without LangChain installed)
+def _analysis_messages(ino_code: str, chip_name: str):
+    return [
+        ("system", SYSTEM_PROMPT),
+        ("human", f"Target board/chip: {chip_name}\n\nArduino code:\n\n{ino_code}")
+    ]
+
+def _fix_messages(raw_text: str):
+    return [
+        ("system", "You are a strict JSON fixer."),
+        ("human", f"Fix the following text into valid JSON matching the schema:\n\n{raw_text}")
+    ]
+
+def _record_usage(s, response):
+    """Attach token counts (when the model reports them) to the span and counters."""
+    usage = getattr(response, "usage_metadata", None) or {}
+    for kind in ("input", "output"):
+        tokens = usage.get(f"{kind}_tokens")
+        if tokens is not None:
+            s[f"{kind}_tokens"] = tokens
+            count("llm_tokens_total", tokens, kind=kind)
+
+def _invoke(messages, step):
+    with span("llm.invoke", step=step) as s:
+        response = get_llm().invoke(messages)
+        _record_usage(s, response)
+    return response.content
+
+async def _ainvoke(messages, step):
+    with span("llm.invoke", step=step) as s:
+        response = await get_llm().ainvoke(messages)
+        _record_usage(s, response)
+    return response.content
+
+def _try_json(text: str):
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return None
+
 def analyze_code(ino_file_path: str, chip_name: str):
     """
     Dynamically analyze any uploaded .ino file and return JSON with PCB components & connections.
@@ -49,27 +109,34 @@ def analyze_code(ino_file_path: str, chip_name: str):
         ino_code = f.read()
 
     # Step 1: ask model for PCB JSON
-    messages = [
-        SystemMessage(content=SYSTEM_PROMPT),
-        HumanMessage(content=f"Target board/chip: {chip_name}\n\nArduino code:\n\n{ino_code}")
-    ]
-
-    response = llm.invoke(messages)
-    raw_text = response.content
+    raw_text = _invoke(_analysis_messages(ino_code, chip_name), "analyze")
 
     # Step 2: try parsing JSON
-    try:
-        return json.loads(raw_text)
-    except json.JSONDecodeError:
-        # Step 3: retry asking model to fix JSON strictly
-        fix_messages = [
-            SystemMessage(content="You are a strict JSON fixer."),
-            HumanMessage(content=f"Fix the following text into valid JSON matching the schema:\n\n{raw_text}")
-        ]
-        retry_text = llm.invoke(fix_messages).content
-
-        try:
-            return json.loads(retry_text)
-        except json.JSONDecodeError:
-            # Fallback: return raw response
-            return {"raw_response": raw_text}
+    parsed = _try_json(raw_text)
+    if parsed is not None:
+        return parsed
+
+    # Step 3: retry asking model to fix JSON strictly
+    parsed = _try_json(_invoke(_fix_messages(raw_text), "fix_json"))
+    if parsed is not None:
+        return parsed
+
+    # Fallback: return raw response
+    return {"raw_response": raw_text}
+
+async def analyze_code_async(ino_file_path: str, chip_name: str):
+    """Same as analyze_code, but awaits the model instead of blocking a thread."""
+    with open(ino_file_path, "r") as f:
+        ino_code = f.read()
+
+    raw_text = await _ainvoke(_analysis_messages(ino_code, chip_name), "analyze")
+
+    parsed = _try_json(raw_text)
+    if parsed is not None:
+        return parsed
+
+    parsed = _try_json(await _ainvoke(_fix_messages(raw_text), "fix_json"))
+    if parsed is not None:
+        return parsed
+
+    return {"raw_response": raw_text}
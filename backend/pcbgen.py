@@ -10,6 +10,8 @@ import json
 import glob
 import re
 
+from tracing import span
+
 # Map: footprint_name -> list of .pretty directories that contain it
 FOOTPRINT_INDEX = {}  # {"R_0805_2012Metric": [".../Resistor_SMD.pretty", ...], ...}
 DEFAULT_PLACEHOLDER = ("Resistor_SMD", "R_0805_2012Metric")  # fallback
@@ -104,6 +106,10 @@ def _placeholder_path():
             return dirs[0], k
     return None, None  # should not happen if stock libs exist
 
+def _footprint_load(libdir, fpname):
+    with span("pcb.footprint_load", footprint=fpname):
+        return pcbnew.FootprintLoad(libdir, fpname)
+
 def _place_footprint_props(footprint, comp):
     footprint.Reference().SetText(comp["name"])
     footprint.Value().SetText(comp.get("value", comp.get("type", comp["name"])))
@@ -123,7 +129,7 @@ def load_footprint(comp):
     pretty_dir, fpname = _resolve_footprint_path(req)
 
     if pretty_dir and fpname:
-        fp = pcbnew.FootprintLoad(pretty_dir, fpname)
+        fp = _footprint_load(pretty_dir, fpname)
         if fp:
             print(f"✅ {comp['name']}: {fpname}  ← {os.path.basename(pretty_dir)}")
             return _place_footprint_props(fp, comp)
@@ -133,7 +139,7 @@ def load_footprint(comp):
     # Placeholder
     pdir, pname = _placeholder_path()
     if pdir and pname:
-        fp = pcbnew.FootprintLoad(pdir, pname)
+        fp = _footprint_load(pdir, pname)
         if fp:
             print(f"⚠️ {comp['name']}: using placeholder {pname} from {os.path.basename(pdir)}")
             return _place_footprint_props(fp, comp)
@@ -146,7 +152,8 @@ def generate_pcb(pcb_json, project_name="dynamic_pcb"):
     libs = pcb_json.get("libraries")
     if isinstance(libs, dict):
         extra_paths = libs.get("footprint_paths", []) or []
-    build_footprint_index(extra_paths)
+    with span("pcb.footprint_index"):
+        build_footprint_index(extra_paths)
 
     board = pcbnew.BOARD()
 
@@ -180,7 +187,8 @@ def generate_pcb(pcb_json, project_name="dynamic_pcb"):
     out_dir = os.path.abspath(project_name)
     os.makedirs(out_dir, exist_ok=True)
     board_file = os.path.join(out_dir, f"{project_name}.kicad_pcb")
-    pcbnew.SaveBoard(board_file, board)
+    with span("pcb.save"):
+        pcbnew.SaveBoard(board_file, board)
     print(f"✅ PCB saved to {board_file}")
 
     # Plot Gerbers
@@ -205,8 +213,9 @@ def generate_pcb(pcb_json, project_name="dynamic_pcb"):
     ]
     for layer, name in layers:
         pc.SetLayer(layer)
-        pc.OpenPlotfile(name, pcbnew.PLOT_FORMAT_GERBER, name)
-        pc.PlotLayer()
+        with span("pcb.plot_layer", layer=name):
+            pc.OpenPlotfile(name, pcbnew.PLOT_FORMAT_GERBER, name)
+            pc.PlotLayer()
     pc.ClosePlot()
     print(f"✅ Gerbers written to {gerber_dir}")
 
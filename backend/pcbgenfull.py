@@ -10,8 +10,15 @@ import json
 import glob
 import re
 
+from tracing import span
+from footprint_meta import FootprintTable, index_libraries
+from pcbzones import (LAYERS, assign_nets, connected_by_pour, create_zones, endpoint_nets,
+                      pour_islands, pour_pads, pour_specs, remove_zones, served_by_pour)
+
 # Map: footprint_name -> list of .pretty directories that contain it
 FOOTPRINT_INDEX = {}  # {"R_0805_2012Metric": [".../Resistor_SMD.pretty", ...], ...}
+# Pads, size, tags... of every indexed footprint, read from the .kicad_mod files
+FOOTPRINT_META = FootprintTable()
 DEFAULT_PLACEHOLDER = ("Resistor_SMD", "R_0805_2012Metric")  # fallback
 
 def _existing_dirs(paths):
@@ -36,7 +43,7 @@ def build_footprint_index(extra_search_paths=None):
     Build index of footprint names -> .pretty directory paths.
     Scans KiCad stock libs and any user-provided folders (.pretty or parent).
     """
-    global FOOTPRINT_INDEX
+    global FOOTPRINT_INDEX, FOOTPRINT_META
     FOOTPRINT_INDEX.clear()
 
     search_roots = _guess_kicad_share_dirs()
@@ -52,48 +59,76 @@ def build_footprint_index(extra_search_paths=None):
     search_roots = _existing_dirs(list(dict.fromkeys(search_roots)))  # dedupe & keep order
 
     print("🔍 Scanning libraries:")
+    pretty_dirs = []
     for root in search_roots:
         print("   •", root)
-        pretty_dirs = [root] if root.lower().endswith(".pretty") else glob.glob(os.path.join(root, "*.pretty"))
-        for libdir in pretty_dirs:
-            for modpath in glob.glob(os.path.join(libdir, "*.kicad_mod")):
-                name = os.path.splitext(os.path.basename(modpath))[0]
-                FOOTPRINT_INDEX.setdefault(name, []).append(libdir)
+        pretty_dirs += [root] if root.lower().endswith(".pretty") else sorted(glob.glob(os.path.join(root, "*.pretty")))
+
+    FOOTPRINT_META = index_libraries(list(dict.fromkeys(pretty_dirs)))
+    for name, libdir in zip(FOOTPRINT_META.name, FOOTPRINT_META.libdir):
+        FOOTPRINT_INDEX.setdefault(name, []).append(libdir)
 
     print(f"✅ Indexed {len(FOOTPRINT_INDEX)} unique footprints")
 
-def _fuzzy_find_name(requested):
-    """Best-effort fuzzy match: ignore non-alnum, case-insensitive, allow substrings."""
+def _fuzzy_find_name(requested, accept=None):
+    """
+    Best-effort fuzzy match: ignore non-alnum, case-insensitive, allow substrings.
+    With `accept`, only candidates it returns True for are considered.
+    """
     norm = re.sub(r"[^A-Za-z0-9]", "", requested).lower()
     if not norm:
         return None
+    normalized = [(cand, re.sub(r"[^A-Za-z0-9]", "", cand).lower()) for cand in FOOTPRINT_INDEX.keys()]
     # Exact ignoring punctuation
-    for cand in FOOTPRINT_INDEX.keys():
-        if re.sub(r"[^A-Za-z0-9]", "", cand).lower() == norm:
+    for cand, cand_norm in normalized:
+        if cand_norm == norm and (accept is None or accept(cand)):
             return cand
     # Substring match
-    for cand in FOOTPRINT_INDEX.keys():
-        if norm in re.sub(r"[^A-Za-z0-9]", "", cand).lower():
+    for cand, cand_norm in normalized:
+        if norm in cand_norm and (accept is None or accept(cand)):
             return cand
     return None
 
-def _resolve_footprint_path(name):
+def _fitting_dir(name, required=None, max_size=None):
+    """First .pretty dir whose `name` has the required pins and fits max_size, or None."""
+    for row in FOOTPRINT_META.rows_by_name.get(name, []):
+        if FOOTPRINT_META.fits(row, required, max_size):
+            return FOOTPRINT_META.libdir[row]
+    return None
+
+def _resolve_footprint_path(name, required=None, max_size=None):
     """
     Given a footprint base name, return (pretty_dir, footprint_name)
-    using our index. Picks the first path if multiple.
+    using our index. Picks the first path if multiple, preferring ones that
+    have the `required` pins and fit `max_size` (see FootprintTable.fits).
     """
     if name in FOOTPRINT_INDEX and FOOTPRINT_INDEX[name]:
-        return FOOTPRINT_INDEX[name][0], name
-    # try fuzzy
-    fuzzy = _fuzzy_find_name(name)
+        return _fitting_dir(name, required, max_size) or FOOTPRINT_INDEX[name][0], name
+    # try fuzzy, preferring candidates that fit
+    fuzzy = None
+    if required or max_size:
+        fuzzy = _fuzzy_find_name(name, lambda cand: _fitting_dir(cand, required, max_size) is not None)
+    fuzzy = fuzzy or _fuzzy_find_name(name)
     if fuzzy and FOOTPRINT_INDEX.get(fuzzy):
         print(f"⚠️ Fuzzy matched '{name}' -> '{fuzzy}'")
-        return FOOTPRINT_INDEX[fuzzy][0], fuzzy
+        return _fitting_dir(fuzzy, required, max_size) or FOOTPRINT_INDEX[fuzzy][0], fuzzy
     return None, None
 
-def _placeholder_path():
-    """Find placeholder R_0805_2012Metric anywhere."""
+def _placeholder_path(required=None, max_size=None):
+    """
+    Find placeholder R_0805_2012Metric anywhere. When the component needs
+    pins or a size the resistor can't offer, use the smallest footprint
+    that has them instead.
+    """
     libnick, fpname = DEFAULT_PLACEHOLDER
+    if required or max_size:
+        if _fitting_dir(fpname, required, max_size):
+            return _fitting_dir(fpname, required, max_size), fpname
+        meta = FOOTPRINT_META
+        rows = [i for i in range(len(meta)) if meta.fits(i, required, max_size)]
+        if rows:
+            best = min(rows, key=lambda i: (len(meta.pad_names(i)), meta.width[i] * meta.height[i]))
+            return meta.libdir[best], meta.name[best]
     # Prefer a library dir that looks like the nickname
     for name, dirs in FOOTPRINT_INDEX.items():
         if name == fpname and dirs:
@@ -104,6 +139,10 @@ def _placeholder_path():
             return dirs[0], k
     return None, None  # should not happen if stock libs exist
 
+def _footprint_load(libdir, fpname):
+    with span("pcb.footprint_load", footprint=fpname):
+        return pcbnew.FootprintLoad(libdir, fpname)
+
 def _place_footprint_props(footprint, comp):
     footprint.Reference().SetText(comp["name"])
     footprint.Value().SetText(comp.get("value", comp.get("type", comp["name"])))
@@ -111,19 +150,42 @@ def _place_footprint_props(footprint, comp):
     footprint.SetOrientationDegrees(float(comp.get("rotation", 0.0)))
     return footprint
 
-def load_footprint(comp):
+def _max_size(comp):
+    size = comp.get("max_size")
+    if isinstance(size, dict) and "width" in size and "height" in size:
+        return float(size["width"]), float(size["height"])
+    return None
+
+def required_pins(pcb_json):
+    """
+    {component name: [set of acceptable pad names, one per pin]} for every
+    pin the connections use, so footprint selection can skip footprints
+    that lack them (pin aliases as in find_pad_by_name).
+    """
+    pins = {}
+    for connection in pcb_json.get("connections", []):
+        for end in ("from", "to"):
+            comp, _, pin = str(connection.get(end, "")).partition(":")
+            if pin:
+                pins.setdefault(comp, {})[pin] = {pin, *PIN_ALIASES.get(pin, [])}
+    return {comp: list(by_pin.values()) for comp, by_pin in pins.items()}
+
+def load_footprint(comp, required=None):
     """
     Load a footprint robustly:
       1) exact match by file name,
       2) fuzzy match,
       3) placeholder
+    Candidates with the `required` pins (see required_pins) that fit the
+    component's optional "max_size" {"width", "height"} in mm are preferred.
     Returns a placed FOOTPRINT ready to add to board.
     """
     req = str(comp["footprint"]).strip()
-    pretty_dir, fpname = _resolve_footprint_path(req)
+    max_size = _max_size(comp)
+    pretty_dir, fpname = _resolve_footprint_path(req, required, max_size)
 
     if pretty_dir and fpname:
-        fp = pcbnew.FootprintLoad(pretty_dir, fpname)
+        fp = _footprint_load(pretty_dir, fpname)
         if fp:
             print(f"✅ {comp['name']}: {fpname}  ← {os.path.basename(pretty_dir)}")
             return _place_footprint_props(fp, comp)
@@ -131,34 +193,34 @@ def load_footprint(comp):
             print(f"⚠️ Failed to load {fpname} from {pretty_dir}, will use placeholder")
 
     # Placeholder
-    pdir, pname = _placeholder_path()
+    pdir, pname = _placeholder_path(required, max_size)
     if pdir and pname:
-        fp = pcbnew.FootprintLoad(pdir, pname)
+        fp = _footprint_load(pdir, pname)
         if fp:
             print(f"⚠️ {comp['name']}: using placeholder {pname} from {os.path.basename(pdir)}")
             return _place_footprint_props(fp, comp)
 
     raise RuntimeError(f"Could not load footprint for {comp['name']} (requested '{req}')")
 
+# Handle common pin name mappings for ATmega328P and components
+PIN_ALIASES = {
+    'PB5': ['19'],  # ATmega328P DIP-28 pin 19
+    'VCC': ['7'],   # ATmega328P DIP-28 pin 7  
+    'GND': ['8'],   # ATmega328P DIP-28 pin 8
+    'Power': ['7'], # Same as VCC
+    'Anode': ['1'], # LED anode is typically pin 1
+    'Cathode': ['2'] # LED cathode is typically pin 2
+}
+
 def find_pad_by_name(footprint, pad_name):
     """Find a pad in the footprint by name/number."""
-    # Handle common pin name mappings for ATmega328P and components
-    pin_mappings = {
-        'PB5': ['19'],  # ATmega328P DIP-28 pin 19
-        'VCC': ['7'],   # ATmega328P DIP-28 pin 7  
-        'GND': ['8'],   # ATmega328P DIP-28 pin 8
-        'Power': ['7'], # Same as VCC
-        'Anode': ['1'], # LED anode is typically pin 1
-        'Cathode': ['2'] # LED cathode is typically pin 2
-    }
-    
     # Try exact match first
     for pad in footprint.Pads():
         if pad.GetName() == pad_name:
             return pad
     
     # Try mapped alternatives
-    alternatives = pin_mappings.get(pad_name, [])
+    alternatives = PIN_ALIASES.get(pad_name, [])
     for alt in alternatives:
         for pad in footprint.Pads():
             if pad.GetName() == alt:
@@ -169,13 +231,18 @@ def find_pad_by_name(footprint, pad_name):
     print(f"   Available pads on {footprint.GetReference()}: {available_pads}")
     return None
 
-def create_connections(board, pcb_json, footprints_map):
-    """Create electrical connections (tracks) between component pads."""
+def create_connections(board, pcb_json, footprints_map, connections=None):
+    """
+    Create electrical connections (tracks) between component pads.
+    Pass `connections` to route only a subset (used by incremental updates).
+    """
     track_width = float(pcb_json.get("board", {}).get("track_width", 0.25))
+    if connections is None:
+        connections = pcb_json.get("connections", [])
     
     print("🔗 Creating connections...")
     
-    for connection in pcb_json.get("connections", []):
+    for connection in connections:
         try:
             # Parse connection format: "ComponentName:PinName"
             from_comp, from_pin = connection["from"].split(":")
@@ -269,13 +336,68 @@ def apply_board_settings(board, pcb_json):
         design_settings.SetCopperLayerCount(layer_count)
         print(f"✅ Set copper layer count: {layer_count}")
 
-def generate_pcb(pcb_json, project_name="dynamic_pcb"):
+def _footprint_index_paths(pcb_json):
     # Optional: user-provided extra library roots
-    extra_paths = []
     libs = pcb_json.get("libraries")
     if isinstance(libs, dict):
-        extra_paths = libs.get("footprint_paths", []) or []
-    build_footprint_index(extra_paths)
+        return libs.get("footprint_paths", []) or []
+    return []
+
+def _design_snapshot_path(out_dir, project_name):
+    return os.path.join(out_dir, f"{project_name}.design.json")
+
+def save_board_and_gerbers(board, pcb_json, project_name):
+    """Save .kicad_pcb, plot Gerbers and remember the design for incremental runs."""
+    # Save .kicad_pcb
+    out_dir = os.path.abspath(project_name)
+    os.makedirs(out_dir, exist_ok=True)
+    board_file = os.path.join(out_dir, f"{project_name}.kicad_pcb")
+    with span("pcb.save"):
+        pcbnew.SaveBoard(board_file, board)
+    print(f"✅ PCB saved to {board_file}")
+
+    # Remember what this board was built from (see update_pcb). Written right
+    # after the board so the two never disagree, even if plotting fails below.
+    with open(_design_snapshot_path(out_dir, project_name), "w", encoding="utf-8") as f:
+        json.dump(pcb_json, f, indent=2)
+    LAST_BOARDS[project_name] = (board_file, os.path.getmtime(board_file), board)
+
+    # Plot Gerbers
+    gerber_dir = os.path.join(out_dir, "gerbers")
+    os.makedirs(gerber_dir, exist_ok=True)
+
+    pc = pcbnew.PLOT_CONTROLLER(board)
+    po = pc.GetPlotOptions()
+    po.SetOutputDirectory(gerber_dir)
+    po.SetUseGerberProtelExtensions(True)
+    po.SetExcludeEdgeLayer(True)
+    po.SetScale(1.0)
+
+    layers = [
+        (pcbnew.F_Cu, "F_Cu"),
+        (pcbnew.B_Cu, "B_Cu"),
+        (pcbnew.F_SilkS, "F_SilkS"),
+        (pcbnew.B_SilkS, "B_SilkS"),
+        (pcbnew.F_Mask, "F_Mask"),
+        (pcbnew.B_Mask, "B_Mask"),
+        (pcbnew.Edge_Cuts, "Edge_Cuts"),
+    ]
+    for layer, name in layers:
+        pc.SetLayer(layer)
+        with span("pcb.plot_layer", layer=name):
+            pc.OpenPlotfile(name, pcbnew.PLOT_FORMAT_GERBER, name)
+            pc.PlotLayer()
+    pc.ClosePlot()
+    print(f"✅ Gerbers written to {gerber_dir}")
+
+    return board_file, gerber_dir
+
+def generate_pcb(pcb_json, project_name="dynamic_pcb", incremental=False):
+    if incremental:
+        return update_pcb(pcb_json, project_name)
+
+    with span("pcb.footprint_index"):
+        build_footprint_index(_footprint_index_paths(pcb_json))
 
     board = pcbnew.BOARD()
 
@@ -302,66 +424,302 @@ def generate_pcb(pcb_json, project_name="dynamic_pcb"):
 
     # Place components and build footprints map
     footprints_map = {}
+    pins = required_pins(pcb_json)
     for comp in pcb_json.get("components", []):
         try:
-            fp = load_footprint(comp)
+            fp = load_footprint(comp, pins.get(comp["name"]))
             board.Add(fp)
             footprints_map[comp["name"]] = fp
         except Exception as e:
             print(f"❌ Failed to place {comp.get('name','?')}: {e}")
 
+    # Put GND/VCC pads on nets; connections a pour may make wait for its fill
+    specs = pour_specs(pcb_json)
+    poured = _pour_connections(board, pcb_json, footprints_map, specs)
+    poured_keys = {_connection_key(c) for c in poured}
+    routed = [c for c in pcb_json.get("connections", []) if _connection_key(c) not in poured_keys]
+
     # Create connections between components
-    create_connections(board, pcb_json, footprints_map)
+    with span("pcb.connections"):
+        create_connections(board, pcb_json, footprints_map, routed)
     
     # Create drills/mounting holes
     create_drills(board, pcb_json)
 
-    # Save .kicad_pcb
-    out_dir = os.path.abspath(project_name)
-    os.makedirs(out_dir, exist_ok=True)
-    board_file = os.path.join(out_dir, f"{project_name}.kicad_pcb")
-    pcbnew.SaveBoard(board_file, board)
-    print(f"✅ PCB saved to {board_file}")
+    # Copper pours go last so their fill clears the tracks and drills
+    if specs:
+        _create_pours(board, pcb_json, footprints_map, specs, poured)
 
-    # Plot Gerbers
-    gerber_dir = os.path.join(out_dir, "gerbers")
-    os.makedirs(gerber_dir, exist_ok=True)
+    return save_board_and_gerbers(board, pcb_json, project_name)
 
-    pc = pcbnew.PLOT_CONTROLLER(board)
-    po = pc.GetPlotOptions()
-    po.SetOutputDirectory(gerber_dir)
-    po.SetUseGerberProtelExtensions(True)
-    po.SetExcludeEdgeLayer(True)
-    po.SetScale(1.0)
+def _pour_connections(board, pcb_json, footprints_map, specs):
+    """Assign pour nets; return the design's connections a pour may make instead of a track."""
+    if not specs:
+        return []
+    nets = assign_nets(board, pcb_json, footprints_map, find_pad_by_name, {s["net"] for s in specs})
+    pads = pour_pads(nets, specs)
+    return [c for c in pcb_json.get("connections", [])
+            if served_by_pour(c, footprints_map, find_pad_by_name, pads)]
 
-    layers = [
-        (pcbnew.F_Cu, "F_Cu"),
-        (pcbnew.B_Cu, "B_Cu"),
-        (pcbnew.F_SilkS, "F_SilkS"),
-        (pcbnew.B_SilkS, "B_SilkS"),
-        (pcbnew.F_Mask, "F_Mask"),
-        (pcbnew.B_Mask, "B_Mask"),
-        (pcbnew.Edge_Cuts, "Edge_Cuts"),
-    ]
-    for layer, name in layers:
-        pc.SetLayer(layer)
-        pc.OpenPlotfile(name, pcbnew.PLOT_FORMAT_GERBER, name)
-        pc.PlotLayer()
-    pc.ClosePlot()
-    print(f"✅ Gerbers written to {gerber_dir}")
+def _create_pours(board, pcb_json, footprints_map, specs, poured):
+    """
+    Fill the pours, then route the `poured` connections the fill doesn't
+    actually make (pads on separate islands, or cut off by tracks and drills).
+    """
+    with span("pcb.zones"):
+        zones = create_zones(board, pcb_json, specs)
+        islands = pour_islands(board, zones)
+    unreached = [c for c in poured if not connected_by_pour(c, footprints_map, find_pad_by_name, islands)]
+    print(f"🟫 {len(poured) - len(unreached)} connections made by the copper pours")
+    if not unreached:
+        return
+
+    # Tracks from an earlier run may already make some of them
+    tracked = {(_point_key(t.GetStart()), _point_key(t.GetEnd())) for t in board.GetTracks()}
+    ends = {}
+    for c in unreached:
+        key = _connection_endpoints(c, footprints_map)
+        if key is not None and key not in tracked:
+            ends[key] = c
+    print(f"⚠️ {len(unreached)} connections not reached by the pours, routing {len(ends)}")
+    with span("pcb.connections", rerouted=len(ends)):
+        create_connections(board, pcb_json, footprints_map, list(ends.values()))
+
+    # Put the new tracks on the pour net, so a refill joins them instead of clearing them
+    nets = endpoint_nets(pcb_json)
+    for track in board.GetTracks():
+        c = ends.get((_point_key(track.GetStart()), _point_key(track.GetEnd())))
+        if c is not None:
+            track.SetNet(board.FindNet(nets[c["from"]]))
+    if ends and pcbnew.F_Cu in {LAYERS[spec["layer"]] for spec in specs}:  # tracks are drawn on F.Cu
+        remove_zones(board)
+        with span("pcb.zones"):
+            create_zones(board, pcb_json, specs)
+
+# ---------------------------------------------------------------------------
+# Incremental regeneration
+# ---------------------------------------------------------------------------
+
+# project_name -> (board_file, mtime, BOARD) of the last board we saved
+LAST_BOARDS = {}
+
+def _connection_key(connection):
+    return (str(connection.get("from", "")), str(connection.get("to", "")))
+
+def _connection_components(connection):
+    return {str(connection.get(end, "")).split(":")[0] for end in ("from", "to")}
+
+def diff_designs(old_json, new_json):
+    """
+    Structural diff of two design JSONs.
+    Components are matched by name; a changed footprint/value/type means the
+    footprint has to be reloaded, a changed position/rotation only moves it.
+    """
+    old_comps = {c["name"]: c for c in old_json.get("components", [])}
+    new_comps = {c["name"]: c for c in new_json.get("components", [])}
+
+    def _identity(c):
+        return (c.get("footprint"), c.get("value"), c.get("type"))
+
+    def _placement(c):
+        return (c.get("position"), c.get("rotation", 0.0))
+
+    common = [n for n in new_comps if n in old_comps]
+    old_conns = {_connection_key(c): c for c in old_json.get("connections", [])}
+    new_conns = {_connection_key(c): c for c in new_json.get("connections", [])}
+
+    return {
+        "added": [n for n in new_comps if n not in old_comps],
+        "removed": [n for n in old_comps if n not in new_comps],
+        "replaced": [n for n in common if _identity(old_comps[n]) != _identity(new_comps[n])],
+        "moved": [n for n in common
+                  if _identity(old_comps[n]) == _identity(new_comps[n])
+                  and _placement(old_comps[n]) != _placement(new_comps[n])],
+        "connections_added": [new_conns[k] for k in new_conns if k not in old_conns],
+        "connections_removed": [old_conns[k] for k in old_conns if k not in new_conns],
+        "drills_changed": old_json.get("drills", []) != new_json.get("drills", []),
+        # Pours decide which connections get tracks at all, so they count as board settings
+        "board_changed": (old_json.get("board") != new_json.get("board")
+                          or old_json.get("libraries") != new_json.get("libraries")
+                          or pour_specs(old_json) != pour_specs(new_json)),
+    }
 
-    return board_file, gerber_dir
+def _point_key(point):
+    return (int(point.x), int(point.y))
+
+def _connection_endpoints(connection, footprints_map):
+    """Pad positions a connection's track was drawn between, or None."""
+    try:
+        from_comp, from_pin = connection["from"].split(":")
+        to_comp, to_pin = connection["to"].split(":")
+    except (KeyError, ValueError):
+        return None
+    from_fp = footprints_map.get(from_comp)
+    to_fp = footprints_map.get(to_comp)
+    if not from_fp or not to_fp:
+        return None
+    from_pad = find_pad_by_name(from_fp, from_pin)
+    to_pad = find_pad_by_name(to_fp, to_pin)
+    if not from_pad or not to_pad:
+        return None
+    return _point_key(from_pad.GetPosition()), _point_key(to_pad.GetPosition())
+
+def _remove_connection_tracks(board, connections, footprints_map):
+    """Delete the straight tracks create_connections drew for these connections."""
+    tracks = {}
+    for track in board.GetTracks():
+        tracks.setdefault((_point_key(track.GetStart()), _point_key(track.GetEnd())), []).append(track)
+
+    removed = 0
+    for connection in connections:
+        ends = _connection_endpoints(connection, footprints_map)
+        if not ends:
+            continue
+        bucket = tracks.get(ends)
+        if bucket:
+            board.Remove(bucket.pop())
+            removed += 1
+    return removed
+
+def _remove_drills(board):
+    for drawing in list(board.GetDrawings()):
+        if drawing.GetLayer() == pcbnew.Edge_Cuts and drawing.GetShape() == pcbnew.SHAPE_T_CIRCLE:
+            board.Remove(drawing)
+
+def _load_last_board(project_name):
+    """Return (old_json, board) from the previous run, or (None, None)."""
+    out_dir = os.path.abspath(project_name)
+    board_file = os.path.join(out_dir, f"{project_name}.kicad_pcb")
+    snapshot = _design_snapshot_path(out_dir, project_name)
+    if not (os.path.isfile(board_file) and os.path.isfile(snapshot)):
+        return None, None
+
+    with open(snapshot, "r", encoding="utf-8") as f:
+        old_json = json.load(f)
+
+    # Reuse the in-memory board if nobody touched the file since we saved it.
+    # The entry is taken out while the board is being edited and only put
+    # back by save_board_and_gerbers, so a run that fails halfway can't leave
+    # a half-updated board cached next to the old snapshot.
+    cached = LAST_BOARDS.pop(project_name, None)
+    if cached and cached[0] == board_file and cached[1] == os.path.getmtime(board_file):
+        return old_json, cached[2]
+    return old_json, pcbnew.LoadBoard(board_file)
+
+def update_pcb(pcb_json, project_name="dynamic_pcb"):
+    """
+    Incrementally regenerate a board: diff the design against the one the
+    existing .kicad_pcb was built from and only apply what changed.
+    Falls back to generate_pcb when there is no previous run or the board
+    itself (size, layers, rules, libraries, copper pours) changed.
+    """
+    old_json, board = _load_last_board(project_name)
+    if board is None:
+        print("ℹ️ No previous board found, doing a full regeneration")
+        return generate_pcb(pcb_json, project_name)
+
+    diff = diff_designs(old_json, pcb_json)
+    if diff["board_changed"]:
+        print("ℹ️ Board settings changed, doing a full regeneration")
+        return generate_pcb(pcb_json, project_name)
+
+    new_comps = {c["name"]: c for c in pcb_json.get("components", [])}
+    footprints_map = {fp.GetReference(): fp for fp in board.GetFootprints()}
+
+    touched = set(diff["removed"]) | set(diff["replaced"]) | set(diff["moved"])
+    specs = pour_specs(pcb_json)
+    pour_layers = {LAYERS[spec["layer"]] for spec in specs}
+
+    def on_pours(name):
+        fp = footprints_map.get(name)
+        return fp is not None and any(pad.IsOnLayer(layer) for pad in fp.Pads() for layer in pour_layers)
+
+    # Pads leaving a pour layer (checked before the footprints change)
+    refill = any(on_pours(name) for name in touched)
+    print(f"🔁 Incremental update: +{len(diff['added'])} -{len(diff['removed'])} "
+          f"~{len(diff['replaced'])} replaced, {len(diff['moved'])} moved, "
+          f"+{len(diff['connections_added'])}/-{len(diff['connections_removed'])} connections")
+
+    # Tracks whose pads are about to change: anything touching a removed,
+    # replaced or moved component, plus connections dropped from the design.
+    # Their endpoints must be looked up before the footprints change.
+    stale = [c for c in old_json.get("connections", []) if _connection_components(c) & touched]
+    stale += [c for c in diff["connections_removed"] if not (_connection_components(c) & touched)]
+    print(f"🧹 Removed {_remove_connection_tracks(board, stale, footprints_map)} stale tracks")
+
+    for name in diff["removed"] + diff["replaced"]:
+        fp = footprints_map.pop(name, None)
+        if fp:
+            board.Remove(fp)
+
+    for name in diff["moved"]:
+        fp = footprints_map.get(name)
+        if fp:
+            _place_footprint_props(fp, new_comps[name])
+        else:
+            # Failed to place last time, give it another go
+            diff["added"].append(name)
+
+    to_load = diff["added"] + diff["replaced"]
+    if to_load:
+        with span("pcb.footprint_index"):
+            build_footprint_index(_footprint_index_paths(pcb_json))
+    pins = required_pins(pcb_json)
+    for name in to_load:
+        comp = new_comps[name]
+        try:
+            fp = load_footprint(comp, pins.get(name))
+            board.Add(fp)
+            footprints_map[name] = fp
+        except Exception as e:
+            print(f"❌ Failed to place {comp.get('name','?')}: {e}")
+
+    # Reroute only the connections affected by the diff, plus any whose
+    # net changed (e.g. no longer covered by a pour)
+    touched |= set(to_load)
+    added_keys = {_connection_key(c) for c in diff["connections_added"]}
+    old_nets, new_nets = endpoint_nets(old_json), endpoint_nets(pcb_json)
+    reroute = [c for c in pcb_json.get("connections", [])
+               if _connection_components(c) & touched or _connection_key(c) in added_keys
+               or any(old_nets.get(e) != new_nets.get(e) for e in _connection_key(c))]
+    poured = _pour_connections(board, pcb_json, footprints_map, specs)
+    poured_keys = {_connection_key(c) for c in poured}
+    reroute = [c for c in reroute if _connection_key(c) not in poured_keys]
+    with span("pcb.connections", rerouted=len(reroute)):
+        create_connections(board, pcb_json, footprints_map, reroute)
+
+    if diff["drills_changed"]:
+        _remove_drills(board)
+        create_drills(board, pcb_json)
+
+    # Pours depend on the pads, tracks and drills on their layer and on their
+    # nets: refill only when one of those changed (the fill is the slow part)
+    refill = (refill
+              or any(on_pours(name) for name in touched)
+              or diff["drills_changed"]
+              or old_nets != new_nets
+              or (pcbnew.F_Cu in pour_layers and (stale or reroute))  # tracks are drawn on F.Cu
+              or len(board.Zones()) != len(specs))
+    if refill:
+        remove_zones(board)
+        if specs:
+            _create_pours(board, pcb_json, footprints_map, specs, poured)
+    else:
+        print("🟫 Copper pours unaffected, keeping their fill")
+
+    return save_board_and_gerbers(board, pcb_json, project_name)
 
 if __name__ == "__main__":
     import sys
-    if len(sys.argv) < 2:
-        print("Usage: pcbgen.py <design.json> [project_name]")
+    args = [a for a in sys.argv[1:] if a != "--incremental"]
+    if len(args) < 1:
+        print("Usage: pcbgenfull.py <design.json> [project_name] [--incremental]")
         sys.exit(1)
 
-    json_file = sys.argv[1]
-    project_name = sys.argv[2] if len(sys.argv) > 2 else "dynamic_pcb"
+    json_file = args[0]
+    project_name = args[1] if len(args) > 1 else "dynamic_pcb"
 
     with open(json_file, "r", encoding="utf-8") as f:
         pcb_json = json.load(f)
 
-    generate_pcb(pcb_json, project_name)
+    generate_pcb(pcb_json, project_name, incremental="--incremental" in sys.argv)
@@ -0,0 +1,338 @@
+# pcbzones.py — GND/VCC copper pours for pcbgenfull.py
+#
+# Works out which pads belong to the pour nets (from the connection list and
+# pin names), assigns them to KiCad nets, and fills the zones ourselves with
+# vectorized shapely operations: board outline minus clearance-expanded
+# foreign pads, tracks and drills, with thermal reliefs around own-net pads.
+# Without shapely the zones are created unfilled and KiCad's ZONE_FILLER
+# fills them instead (slower, but the board is the same). Either way the fill
+# is read back to check which pads it actually joins (pour_islands).
+
+import pcbnew
+
+from tracing import span
+
+try:
+    import numpy as np
+    import shapely
+except ImportError:  # optional: KiCad's python usually doesn't ship shapely
+    shapely = None
+
+GND_NAMES = {"GND", "VSS", "0V", "AGND", "DGND", "GROUND"}
+VCC_NAMES = {"VCC", "VDD", "VIN", "5V", "+5V", "3V3", "+3V3", "3.3V", "POWER"}
+
+LAYERS = {
+    "F.Cu": pcbnew.F_Cu, "F_Cu": pcbnew.F_Cu, "top": pcbnew.F_Cu,
+    "B.Cu": pcbnew.B_Cu, "B_Cu": pcbnew.B_Cu, "bottom": pcbnew.B_Cu,
+}
+
+DEFAULT_POUR = {
+    "layer": "B.Cu",
+    "clearance": None,          # board clearance when not given
+    "thermal_gap": 0.5,
+    "thermal_spoke_width": 0.5,
+    "min_area": 0.25,           # drop copper islands smaller than this (mm²)
+}
+
+def pour_specs(pcb_json):
+    """
+    Pours to create, from power.pours (none unless asked for, so existing
+    designs keep their tracks):
+      "power": {"pours": [{"net": "GND", "layer": "B.Cu"}, {"net": "VCC", "layer": "F.Cu"}]}
+    """
+    power = pcb_json.get("power") or {}
+    pours = power.get("pours") or []
+    clearance = float(pcb_json.get("board", {}).get("clearance", 0.2))
+
+    specs = []
+    for pour in pours:
+        spec = {**DEFAULT_POUR, **pour}
+        spec["net"] = str(spec.get("net", "GND")).upper()
+        if spec["layer"] not in LAYERS:
+            print(f"⚠️ Unknown pour layer '{spec['layer']}', using B.Cu")
+            spec["layer"] = "B.Cu"
+        if spec["clearance"] is None:
+            spec["clearance"] = clearance
+        specs.append(spec)
+    return specs
+
+def _net_name(pin_names):
+    names = {p.upper() for p in pin_names}
+    if names & GND_NAMES:
+        return "GND"
+    if names & VCC_NAMES:
+        return "VCC"
+    return None
+
+def endpoint_nets(pcb_json):
+    """
+    {"Comp:Pin": net name or None}: connection endpoints grouped into nets
+    (union-find), each group named GND/VCC from its pin names.
+    """
+    parent = {}
+
+    def find(x):
+        parent.setdefault(x, x)
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for connection in pcb_json.get("connections", []):
+        a, b = str(connection.get("from", "")), str(connection.get("to", ""))
+        if ":" in a and ":" in b:
+            parent[find(a)] = find(b)
+
+    groups = {}
+    for endpoint in list(parent):
+        groups.setdefault(find(endpoint), []).append(endpoint)
+
+    nets = {}
+    for endpoints in groups.values():
+        name = _net_name(e.split(":", 1)[1] for e in endpoints)
+        for endpoint in endpoints:
+            nets[endpoint] = name
+    return nets
+
+def assign_nets(board, pcb_json, footprints_map, find_pad, net_names):
+    """
+    Put the pads of nets in `net_names` on a KiCad net, and take pads that
+    are no longer on one (incremental updates reuse the board) off it.
+    Returns {net name: {(ref, pad name): pad}} (keyed because pcbnew hands
+    out a new proxy object for every pad lookup).
+    """
+    nets = {}
+    for endpoint, name in endpoint_nets(pcb_json).items():
+        if name not in net_names:
+            continue
+        comp, pin = endpoint.split(":", 1)
+        fp = footprints_map.get(comp)
+        pad = find_pad(fp, pin) if fp else None
+        if pad is not None:
+            nets.setdefault(name, {})[(comp, pad.GetName())] = pad
+
+    cleared = 0
+    for ref, fp in footprints_map.items():
+        for pad in fp.Pads():
+            name = pad.GetNetname()
+            if name in net_names and (ref, pad.GetName()) not in nets.get(name, {}):
+                pad.SetNetCode(0)  # unconnected, or the pour would tie it in
+                cleared += 1
+    if cleared:
+        print(f"⚡ {cleared} pads left the pour nets")
+
+    for name, pads in nets.items():
+        net = board.FindNet(name)
+        if net is None:
+            net = pcbnew.NETINFO_ITEM(board, name)
+            board.Add(net)
+        for pad in pads.values():
+            pad.SetNet(net)
+        print(f"⚡ Net {name}: {len(pads)} pads")
+    return nets
+
+def _end_keys(connection, footprints_map, find_pad):
+    """((ref, pad name), (ref, pad name)) of a connection's pads, or None."""
+    try:
+        from_comp, from_pin = connection["from"].split(":")
+        to_comp, to_pin = connection["to"].split(":")
+    except (KeyError, ValueError):
+        return None
+    from_fp, to_fp = footprints_map.get(from_comp), footprints_map.get(to_comp)
+    if not from_fp or not to_fp:
+        return None
+    from_pad, to_pad = find_pad(from_fp, from_pin), find_pad(to_fp, to_pin)
+    if from_pad is None or to_pad is None:
+        return None
+    return (from_comp, from_pad.GetName()), (to_comp, to_pad.GetName())
+
+def served_by_pour(connection, footprints_map, find_pad, pour_pads):
+    """
+    True when both ends of a connection sit on the same pour net and layer,
+    so the pour may make it instead of a track (checked against the actual
+    fill by connected_by_pour).
+    """
+    ends = _end_keys(connection, footprints_map, find_pad)
+    return ends is not None and any(set(ends) <= keys for keys in pour_pads.values())
+
+def pour_pads(nets, specs):
+    """{net name: {(ref, pad name)} of pads that touch that net's pour layer}."""
+    out = {}
+    for spec in specs:
+        layer = LAYERS[spec["layer"]]
+        keys = {k for k, pad in nets.get(spec["net"], {}).items() if pad.IsOnLayer(layer)}
+        out.setdefault(spec["net"], set()).update(keys)
+    return out
+
+# ---------------------------------------------------------------------------
+# Geometry (mm)
+# ---------------------------------------------------------------------------
+
+def _pad_boxes(pads):
+    """(n, 4) array of xmin, ymin, xmax, ymax."""
+    boxes = np.empty((len(pads), 4))
+    for i, pad in enumerate(pads):
+        bb = pad.GetBoundingBox()
+        x, y = pcbnew.ToMM(bb.GetX()), pcbnew.ToMM(bb.GetY())
+        boxes[i] = (x, y, x + pcbnew.ToMM(bb.GetWidth()), y + pcbnew.ToMM(bb.GetHeight()))
+    return boxes
+
+def compute_fill(board, layer, net_name, width_mm, height_mm, spec):
+    """Filled area of a pour as a shapely geometry (vectorized over all pads/tracks)."""
+    clearance = float(spec["clearance"])
+    gap = float(spec["thermal_gap"])
+    spoke = float(spec["thermal_spoke_width"]) / 2
+
+    area = shapely.box(0, 0, width_mm, height_mm).buffer(-clearance, join_style="mitre")
+
+    own, foreign = [], []
+    for fp in board.GetFootprints():
+        for pad in fp.Pads():
+            if pad.IsOnLayer(layer):
+                (own if pad.GetNetname() == net_name else foreign).append(pad)
+
+    obstacles = []
+    if foreign:
+        boxes = shapely.box(*_pad_boxes(foreign).T)
+        obstacles.append(shapely.buffer(boxes, clearance, join_style="mitre"))
+
+    # Own-net tracks are the same copper as the pour, everything else is cleared
+    tracks = [t for t in board.GetTracks() if t.GetLayer() == layer and t.GetNetname() != net_name]
+    if tracks:
+        coords = np.array([[(pcbnew.ToMM(t.GetStart().x), pcbnew.ToMM(t.GetStart().y)),
+                            (pcbnew.ToMM(t.GetEnd().x), pcbnew.ToMM(t.GetEnd().y))] for t in tracks])
+        widths = np.array([pcbnew.ToMM(t.GetWidth()) for t in tracks])
+        lines = shapely.linestrings(coords)
+        obstacles.append(shapely.buffer(lines, widths / 2 + clearance))
+
+    drills = [d for d in board.GetDrawings()
+              if d.GetLayer() == pcbnew.Edge_Cuts and d.GetShape() == pcbnew.SHAPE_T_CIRCLE]
+    if drills:
+        centers = shapely.points([(pcbnew.ToMM(d.GetCenter().x), pcbnew.ToMM(d.GetCenter().y)) for d in drills])
+        radii = np.array([pcbnew.ToMM(d.GetRadius()) for d in drills])
+        obstacles.append(shapely.buffer(centers, radii + clearance))
+
+    if own:
+        # Thermal relief: clear a `gap` ring around the pad except for a + of spokes
+        b = _pad_boxes(own)
+        cx, cy = (b[:, 0] + b[:, 2]) / 2, (b[:, 1] + b[:, 3]) / 2
+        pads = shapely.box(*b.T)
+        hbar = shapely.box(b[:, 0] - gap, cy - spoke, b[:, 2] + gap, cy + spoke)
+        vbar = shapely.box(cx - spoke, b[:, 1] - gap, cx + spoke, b[:, 3] + gap)
+        keep = shapely.union(pads, shapely.union(hbar, vbar))
+        obstacles.append(shapely.difference(shapely.buffer(pads, gap, join_style="mitre"), keep))
+
+    if obstacles:
+        area = shapely.difference(area, shapely.union_all(np.concatenate(obstacles)))
+
+    polygons = [p for p in shapely.get_parts(area) if p.geom_type == "Polygon" and p.area >= spec["min_area"]]
+    return shapely.multipolygons(polygons) if polygons else None
+
+def _append_ring(polyset, coords, outline, hole=-1):
+    for x, y in list(coords)[:-1]:  # shapely closes rings, KiCad doesn't want the repeat
+        polyset.Append(pcbnew.FromMM(x), pcbnew.FromMM(y), outline, hole)
+
+def _to_poly_set(geometry):
+    polyset = pcbnew.SHAPE_POLY_SET()
+    for polygon in shapely.get_parts(geometry):
+        outline = polyset.NewOutline()
+        _append_ring(polyset, polygon.exterior.coords, outline)
+        for interior in polygon.interiors:
+            hole = polyset.NewHole(outline)
+            _append_ring(polyset, interior.coords, outline, hole)
+    return polyset
+
+# Within this of a fill polygon counts as touching it (probes sit on pad edges)
+_TOUCH = pcbnew.FromMM(0.01)
+
+def _pad_probes(pad):
+    """Where a fill meets a pad: its centre (thermal spokes start there), edge midpoints and 45° points."""
+    bb = pad.GetBoundingBox()
+    x, y, w, h = bb.GetX(), bb.GetY(), bb.GetWidth(), bb.GetHeight()
+    cx, cy = x + w // 2, y + h // 2
+    dx, dy = int(w * 0.354), int(h * 0.354)  # on the inscribed ellipse
+    points = [(cx, cy), (x, cy), (x + w, cy), (cx, y), (cx, y + h),
+              (cx - dx, cy - dy), (cx + dx, cy - dy), (cx - dx, cy + dy), (cx + dx, cy + dy)]
+    return [pcbnew.VECTOR2I(px, py) for px, py in points]
+
+def pour_islands(board, zones):
+    """
+    {(ref, pad name): {(zone index, polygon index)}}: the filled polygons each
+    pad on a pour's net touches, read back from the zone fill (ours or
+    KiCad's), so pads the fill can't reach or that sit on separate islands
+    are not taken as connected.
+    """
+    islands = {}
+    for i, zone in enumerate(zones):
+        layer, net_name = zone.GetLayer(), zone.GetNetname()
+        polys = zone.GetFilledPolysList(layer)
+        count = polys.OutlineCount()
+        for fp in board.GetFootprints():
+            for pad in fp.Pads():
+                if pad.GetNetname() != net_name or not pad.IsOnLayer(layer):
+                    continue
+                probes = _pad_probes(pad)
+                touched = {(i, j) for j in range(count)
+                           if any(polys.Contains(p, j, _TOUCH) for p in probes)}
+                if touched:
+                    islands.setdefault((fp.GetReference(), pad.GetName()), set()).update(touched)
+    return islands
+
+def connected_by_pour(connection, footprints_map, find_pad, islands):
+    """True when both ends of a connection touch the same filled polygon."""
+    ends = _end_keys(connection, footprints_map, find_pad)
+    if ends is None:
+        return False
+    return bool(islands.get(ends[0], set()) & islands.get(ends[1], set()))
+
+# ---------------------------------------------------------------------------
+# Zones
+# ---------------------------------------------------------------------------
+
+def remove_zones(board):
+    for zone in list(board.Zones()):
+        board.Remove(zone)
+
+def create_zones(board, pcb_json, specs):
+    """Add one filled ZONE per pour spec. Call after tracks and drills exist."""
+    width_mm = float(pcb_json["board"]["size"]["width"])
+    height_mm = float(pcb_json["board"]["size"]["height"])
+    print("🟫 Creating copper pours...")
+
+    used = {pad.GetNetname() for fp in board.GetFootprints() for pad in fp.Pads()}
+    zones = []
+    for spec in specs:
+        net = board.FindNet(spec["net"])
+        if net is None or spec["net"] not in used:
+            print(f"⚠️ No pads on net {spec['net']}, skipping its pour")
+            continue
+        layer = LAYERS[spec["layer"]]
+
+        zone = pcbnew.ZONE(board)
+        zone.SetLayer(layer)
+        zone.SetNet(net)
+        zone.SetLocalClearance(pcbnew.FromMM(spec["clearance"]))
+        zone.SetThermalReliefGap(pcbnew.FromMM(spec["thermal_gap"]))
+        zone.SetThermalReliefSpokeWidth(pcbnew.FromMM(spec["thermal_spoke_width"]))
+        outline = zone.Outline()
+        outline.NewOutline()
+        for x, y in ((0, 0), (width_mm, 0), (width_mm, height_mm), (0, height_mm)):
+            outline.Append(pcbnew.FromMM(x), pcbnew.FromMM(y))
+        board.Add(zone)
+        zones.append(zone)
+
+        if shapely is not None:
+            with span("pcb.zone_fill", net=spec["net"], layer=spec["layer"]) as s:
+                fill = compute_fill(board, layer, spec["net"], width_mm, height_mm, spec)
+                if fill is not None:
+                    zone.SetFilledPolysList(layer, _to_poly_set(fill))
+                    s["polygons"] = len(shapely.get_parts(fill))
+                    s["area_mm2"] = round(fill.area, 1)
+                zone.SetIsFilled(True)
+            print(f"✅ {spec['net']} pour on {spec['layer']}")
+
+    if zones and shapely is None:
+        with span("pcb.zone_fill", filler="kicad"):
+            pcbnew.ZONE_FILLER(board).Fill(zones)
+        print(f"✅ {len(zones)} pours filled by KiCad")
+    return zones
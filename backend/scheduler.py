@@ -0,0 +1,394 @@
+# Resource-aware scheduler for `arduino-cli compile`.
+#
+# Every compile attempt reserves CPU and memory from a global budget before it
+# starts. What an attempt reserves depends on its board family ("arduino:avr",
+# "esp32:esp32", ...) and is learned from past runs (peak RSS and wall time,
+# stored in COMPILE_COSTS_FILE). Waiting attempts are granted fairly between
+# uploads (start-time fair queuing on expected cpu-seconds), so one upload
+# stepping through heavy ESP32 builds can't starve everyone's cheap AVR compiles.
+#
+# Each attempt runs in its own process group with a hard wall-clock limit and,
+# on Linux, an RSS limit for the whole process tree.
+
+import os
+import json
+import time
+import asyncio
+import signal
+import threading
+import subprocess
+import contextlib
+from collections import deque
+
+from tracing import span, count
+
+def _default_memory_mb():
+    try:
+        return int(os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 2**20 * 0.75)
+    except (ValueError, OSError, AttributeError):
+        return 4096
+
+CPU_BUDGET = float(os.getenv("COMPILE_CPU_BUDGET", str(os.cpu_count() or 2)))
+MEMORY_BUDGET_MB = float(os.getenv("COMPILE_MEMORY_BUDGET_MB", str(_default_memory_mb())))
+ATTEMPT_TIMEOUT = float(os.getenv("COMPILE_TIMEOUT", "300"))
+ATTEMPT_RSS_LIMIT_MB = float(os.getenv("COMPILE_RSS_LIMIT_MB", "3072"))
+QUEUE_LIMIT = int(os.getenv("COMPILE_QUEUE_LIMIT", "64"))
+COSTS_FILE = os.getenv("COMPILE_COSTS_FILE", "compile_costs.json")
+
+RSS_POLL_INTERVAL = 0.25
+# Return code reported for attempts we killed (SIGKILL does not exist on Windows)
+KILLED_RETURNCODE = -getattr(signal, "SIGKILL", 9)
+EWMA_ALPHA = 0.3
+
+# Starting guesses until we have measured a family: (cpu, peak RSS MB, seconds)
+FAMILY_PRIORS = {
+    "arduino:avr": (1.0, 250.0, 8.0),
+    "arduino:megaavr": (1.0, 300.0, 10.0),
+    "arduino:samd": (1.0, 400.0, 15.0),
+    "rp2040:rp2040": (2.0, 700.0, 30.0),
+    "esp8266:esp8266": (2.0, 800.0, 40.0),
+    "esp32:esp32": (2.0, 1500.0, 90.0),
+}
+DEFAULT_PRIOR = (1.0, 500.0, 30.0)
+
+class SchedulerBusy(RuntimeError):
+    """Raised when the compile queue is full."""
+
+def board_family(fqbn):
+    """'esp32:esp32:esp32cam' -> 'esp32:esp32'."""
+    return ":".join(fqbn.split(":")[:2])
+
+class _Ticket:
+    __slots__ = ("client", "family", "cpu", "mem_mb", "tag", "granted", "on_grant")
+
+    def __init__(self, client, family, cpu, mem_mb, on_grant):
+        self.client = client
+        self.family = family
+        self.cpu = cpu
+        self.mem_mb = mem_mb
+        self.tag = (0.0, 0)  # (virtual start time, arrival order)
+        self.granted = False
+        self.on_grant = on_grant
+
+class CompileScheduler:
+    def __init__(self, cpu_budget=CPU_BUDGET, memory_budget_mb=MEMORY_BUDGET_MB,
+                 queue_limit=QUEUE_LIMIT, costs_file=COSTS_FILE):
+        self.cpu_budget = cpu_budget
+        self.memory_budget_mb = memory_budget_mb
+        self.queue_limit = queue_limit
+        self.costs_file = costs_file
+
+        self._lock = threading.Lock()
+        self._queues = {}   # client -> deque of waiting tickets
+        self._finish_tags = {}  # client -> virtual finish time of its last ticket
+        self._vtime = 0.0   # virtual start time of the last granted ticket
+        self._arrivals = 0
+        self._running = []  # granted tickets
+        self._cpu_used = 0.0
+        self._mem_used = 0.0
+        self.counters = {"granted": 0, "rejected": 0, "killed_timeout": 0, "killed_memory": 0}
+        self.costs = self._load_costs()
+
+    # -- learned costs ------------------------------------------------------
+
+    def _load_costs(self):
+        try:
+            with open(self.costs_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def _save_costs(self):
+        if not self.costs_file:
+            return
+        tmp_path = f"{self.costs_file}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.costs, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.costs_file)
+        except OSError as e:
+            print(f"⚠️ Could not save compile costs: {e}")
+
+    def family_weight(self, family):
+        """(cpu, memory MB to reserve, expected seconds) for a board family."""
+        cpu, mem_mb, seconds = FAMILY_PRIORS.get(family, DEFAULT_PRIOR)
+        learned = self.costs.get(family)
+        if learned:
+            # No RSS sample (short run, no /proc): keep the prior's memory
+            if learned.get("peak_rss_mb"):
+                mem_mb = learned["peak_rss_mb"] * 1.2
+            seconds = learned["seconds"]
+        return cpu, min(mem_mb, self.memory_budget_mb), seconds
+
+    def record(self, family, seconds, peak_rss_mb):
+        """Fold one successful attempt into the family's moving averages."""
+        with self._lock:
+            learned = self.costs.get(family)
+            if learned is None:
+                learned = self.costs[family] = {"seconds": seconds, "peak_rss_mb": None, "runs": 0}
+            else:
+                learned["seconds"] += EWMA_ALPHA * (seconds - learned["seconds"])
+            # 0 means nothing was sampled, which must not read as "needs no memory"
+            if peak_rss_mb:
+                if learned.get("peak_rss_mb"):
+                    learned["peak_rss_mb"] += EWMA_ALPHA * (peak_rss_mb - learned["peak_rss_mb"])
+                else:
+                    learned["peak_rss_mb"] = peak_rss_mb
+            learned["runs"] += 1
+            self._save_costs()
+
+    # -- admission ----------------------------------------------------------
+
+    def _submit(self, client, family, on_grant):
+        cpu, mem_mb, seconds = self.family_weight(family)
+        ticket = _Ticket(client, family, cpu, mem_mb, on_grant)
+        with self._lock:
+            if sum(len(q) for q in self._queues.values()) >= self.queue_limit:
+                self.counters["rejected"] += 1  # exported by render_metrics
+                raise SchedulerBusy("Compile queue is full")
+            # A client's next attempt starts after the cost of its previous ones,
+            # a newcomer starts "now": it goes ahead of busy clients' follow-ups.
+            start = max(self._vtime, self._finish_tags.get(client, 0.0))
+            self._finish_tags[client] = start + seconds * cpu
+            self._arrivals += 1
+            ticket.tag = (start, self._arrivals)
+            self._queues.setdefault(client, deque()).append(ticket)
+            self._dispatch()
+        return ticket
+
+    def _fits(self, ticket):
+        if not self._running:
+            return True  # an oversized attempt may still run on its own
+        return (self._cpu_used + ticket.cpu <= self.cpu_budget
+                and self._mem_used + ticket.mem_mb <= self.memory_budget_mb)
+
+    def _dispatch(self):
+        """Grant waiting tickets, least-served client first. Caller holds the lock."""
+        while self._queues:
+            # Strict order: cheaper jobs don't jump ahead, or a big ESP32 build
+            # waiting for memory could be starved by a stream of AVR compiles.
+            client = min(self._queues, key=lambda c: self._queues[c][0].tag)
+            ticket = self._queues[client][0]
+            if not self._fits(ticket):
+                return
+            self._queues[client].popleft()
+            if not self._queues[client]:
+                del self._queues[client]
+            self._vtime = max(self._vtime, ticket.tag[0])
+            self._cpu_used += ticket.cpu
+            self._mem_used += ticket.mem_mb
+            self._running.append(ticket)
+            self.counters["granted"] += 1
+            ticket.granted = True
+            ticket.on_grant()
+
+    def _release(self, ticket):
+        with self._lock:
+            if ticket.granted:
+                self._running.remove(ticket)
+                self._cpu_used -= ticket.cpu
+                self._mem_used -= ticket.mem_mb
+            else:
+                queue = self._queues.get(ticket.client)
+                if queue and ticket in queue:
+                    queue.remove(ticket)
+                    if not queue:
+                        del self._queues[ticket.client]
+            if not self._running and not self._queues:
+                self._finish_tags.clear()
+                self._vtime = 0.0
+            self._dispatch()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queued": sum(len(q) for q in self._queues.values()),
+                "running": len(self._running),
+                "clients_waiting": len(self._queues),
+                "cpu_used": self._cpu_used,
+                "cpu_budget": self.cpu_budget,
+                "memory_used_mb": self._mem_used,
+                "memory_budget_mb": self.memory_budget_mb,
+                **self.counters,
+                "families": {f: dict(c) for f, c in self.costs.items()},
+            }
+
+    # -- running ------------------------------------------------------------
+
+    def run(self, cmd, fqbn, client):
+        """Blocking: wait for a slot, then run cmd under the limits. Returns CompletedProcess."""
+        granted = threading.Event()
+        family = board_family(fqbn)
+        with span("compile.queue", family=family):
+            ticket = self._submit(client, family, granted.set)
+            granted.wait()
+        try:
+            return self._run_limited(cmd, family)
+        finally:
+            self._release(ticket)
+
+    async def run_async(self, cmd, fqbn, client):
+        """Async run(): waiting and the compile itself don't block the event loop."""
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+
+        def on_grant():
+            loop.call_soon_threadsafe(lambda: granted.done() or granted.set_result(None))
+
+        family = board_family(fqbn)
+        with span("compile.queue", family=family):
+            ticket = self._submit(client, family, on_grant)
+            try:
+                await granted
+            except asyncio.CancelledError:
+                self._release(ticket)
+                raise
+        try:
+            return await self._run_limited_async(cmd, family)
+        finally:
+            self._release(ticket)
+
+    def _finish(self, cmd, family, returncode, stdout, stderr, started, peak_mb, killed):
+        seconds = time.monotonic() - started
+        if killed:
+            with self._lock:
+                self.counters[f"killed_{killed}"] += 1
+        if killed == "timeout":
+            count("compile_killed_total", reason="timeout", family=family)
+            stderr += f"\n⏱️ Killed after {ATTEMPT_TIMEOUT:.0f}s wall-clock limit"
+            returncode = KILLED_RETURNCODE
+        elif killed == "memory":
+            count("compile_killed_total", reason="memory", family=family)
+            stderr += f"\n💥 Killed: RSS above {ATTEMPT_RSS_LIMIT_MB:.0f} MB"
+            returncode = KILLED_RETURNCODE
+        # Killed runs and failures (missing core, FQBN probing) say little about
+        # the normal cost of a build, only learn from successful ones
+        if not killed and returncode == 0:
+            self.record(family, seconds, peak_mb)
+        return subprocess.CompletedProcess(cmd, returncode, stdout, stderr)
+
+    def _run_limited(self, cmd, family):
+        started = time.monotonic()
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                text=True, start_new_session=True)
+        watcher = _RssWatcher(proc.pid)
+        watcher.start()
+        killed = None
+        try:
+            stdout, stderr = proc.communicate(timeout=ATTEMPT_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            killed = "timeout"
+            _kill_group(proc.pid, proc)
+            stdout, stderr = proc.communicate()
+        finally:
+            watcher.stop()
+        if watcher.exceeded and not killed:
+            killed = "memory"
+        return self._finish(cmd, family, proc.returncode, stdout, stderr, started, watcher.peak_mb, killed)
+
+    async def _run_limited_async(self, cmd, family):
+        started = time.monotonic()
+        proc = await asyncio.create_subprocess_exec(
+            *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+            start_new_session=True
+        )
+        watcher = _RssWatcher(proc.pid)
+        watcher.start()
+        killed = None
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), ATTEMPT_TIMEOUT)
+        except asyncio.TimeoutError:
+            killed = "timeout"
+            _kill_group(proc.pid, proc)
+            stdout, stderr = await proc.communicate()
+        except asyncio.CancelledError:
+            _kill_group(proc.pid, proc)
+            await proc.wait()
+            raise
+        finally:
+            watcher.stop()
+        if watcher.exceeded and not killed:
+            killed = "memory"
+        return self._finish(cmd, family, proc.returncode,
+                            stdout.decode(errors="replace"), stderr.decode(errors="replace"),
+                            started, watcher.peak_mb, killed)
+
+    def render_metrics(self):
+        """Prometheus gauges/counters for queue depth, usage and rejections."""
+        s = self.stats()
+        lines = []
+        for key in ("queued", "running", "cpu_used", "memory_used_mb"):
+            lines.append(f"# TYPE code2pcb_compile_{key} gauge")
+            lines.append(f"code2pcb_compile_{key} {s[key]}")
+        for key in ("granted", "rejected", "killed_timeout", "killed_memory"):
+            lines.append(f"# TYPE code2pcb_compile_{key}_total counter")
+            lines.append(f"code2pcb_compile_{key}_total {s[key]}")
+        return "\n".join(lines) + "\n"
+
+def _kill_group(pid, proc=None):
+    """Kill an attempt and everything it started (its session on POSIX, its process tree on Windows)."""
+    if os.name == "nt":
+        # No process groups to signal; taskkill /T takes the compiler's children down too
+        try:
+            ok = subprocess.run(["taskkill", "/F", "/T", "/PID", str(pid)],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL).returncode == 0
+        except OSError:
+            ok = False
+        if not ok and proc is not None:
+            with contextlib.suppress(ProcessLookupError, OSError):
+                proc.kill()
+        return
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+def _session_rss_mb(sid):
+    """Total RSS of every process in session `sid` (Linux /proc), or None elsewhere."""
+    if not os.path.isdir("/proc"):
+        return None
+    page_mb = os.sysconf("SC_PAGE_SIZE") / 2**20
+    total = 0
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "rb") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # Fields after the ")" closing the command name: state ppid pgrp session ... rss is #24
+        fields = stat[stat.rfind(b")") + 2:].split()
+        if int(fields[3]) == sid:
+            total += int(fields[21]) * page_mb
+    return total
+
+class _RssWatcher:
+    """Polls the RSS of a process tree and kills it above ATTEMPT_RSS_LIMIT_MB."""
+    def __init__(self, pid):
+        self.pid = pid
+        self.peak_mb = 0.0
+        self.exceeded = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._poll, daemon=True)
+
+    def start(self):
+        if os.path.isdir("/proc"):
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _poll(self):
+        while not self._stop.wait(RSS_POLL_INTERVAL):
+            rss = _session_rss_mb(self.pid)
+            if rss is None:
+                return
+            self.peak_mb = max(self.peak_mb, rss)
+            if rss > ATTEMPT_RSS_LIMIT_MB:
+                self.exceeded = True
+                _kill_group(self.pid)
+                return
+
+# Shared by every upload in this process
+SCHEDULER = CompileScheduler()
@@ -0,0 +1,105 @@
+# Content-addressed sketch uploads and stored pipeline results, shared by
+# app.py (Flask) and asgi.py (Quart) so neither server imports the other.
+#
+#   uploads/<sha256>/<filename>               the sketch
+#   uploads/<sha256>/result-v<VERSION>.json   its (successful) pipeline result
+
+from werkzeug.utils import secure_filename
+from concurrent.futures import Future
+import os
+import json
+import hashlib
+import threading
+
+UPLOAD_DIR = "uploads"
+os.makedirs(UPLOAD_DIR, exist_ok=True)
+
+# Bump whenever compile/analyze/pcb output changes so stored results are not reused
+PIPELINE_VERSION = "1"
+
+# pipeline_key() -> Future of the job currently computing it (threaded servers)
+_INFLIGHT = {}
+_INFLIGHT_LOCK = threading.Lock()
+
+def pipeline_key(digest):
+    """"<sha256>-<PIPELINE_VERSION>": in-flight key and ETag of a stored result."""
+    return f"{digest}-{PIPELINE_VERSION}"
+
+def _tmp_path(path):
+    # pid + thread: unique across worker processes and threads
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+def save_upload(file):
+    """
+    Store an upload under its content hash: uploads/<sha256>/<filename>.
+    Returns (digest, filepath). Identical content always lands in the same folder,
+    so concurrent uploads of different sketches with the same name can't clobber each other.
+    """
+    return store_sketch(file.read(), file.filename)
+
+def store_sketch(data, filename):
+    """save_upload for raw bytes (e.g. a member of a zip)."""
+    digest = hashlib.sha256(data).hexdigest()
+    filename = secure_filename(filename or "") or "sketch.ino"
+
+    sketch_dir = os.path.join(UPLOAD_DIR, digest)
+    os.makedirs(sketch_dir, exist_ok=True)
+    filepath = os.path.join(sketch_dir, filename)
+    if not os.path.exists(filepath):
+        tmp_path = _tmp_path(filepath)
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, filepath)
+    return digest, filepath
+
+def result_path(digest):
+    return os.path.join(UPLOAD_DIR, digest, f"result-v{PIPELINE_VERSION}.json")
+
+def load_result(digest):
+    try:
+        with open(result_path(digest), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+def store_result(digest, result):
+    """Store a result; only successful runs are kept, failures may be transient (missing lib, network)."""
+    if result["status"] != "success":
+        return
+    path = result_path(digest)
+    tmp_path = _tmp_path(path)
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+    os.replace(tmp_path, path)
+
+def memoized_pipeline(digest, run):
+    """
+    Return the pipeline result for this content hash, calling run() to compute it.
+    Stored results are returned straight away; identical uploads arriving while
+    a job is running wait on that job instead of starting their own.
+    """
+    key = pipeline_key(digest)
+    with _INFLIGHT_LOCK:
+        future = _INFLIGHT.get(key)
+        owner = future is None
+        if owner:
+            cached = load_result(digest)
+            if cached is not None:
+                return cached
+            future = Future()
+            _INFLIGHT[key] = future
+
+    if not owner:
+        return future.result()
+
+    try:
+        result = run()
+        store_result(digest, result)
+        future.set_result(result)
+        return result
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _INFLIGHT_LOCK:
+            _INFLIGHT.pop(key, None)
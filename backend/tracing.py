@@ -0,0 +1,137 @@
+# Stage timing for the upload pipeline.
+#
+#   with span("compile.fqbn", fqbn=fqbn) as s:
+#       ...
+#       s["ok"] = True
+#
+# Every span feeds a Prometheus histogram (see render_metrics, served at /metrics)
+# and, if a trace was started for the current request, is appended to it so the
+# result JSON can show where the time went. Set TRACING=0 to turn it all off;
+# span() then returns a shared no-op object.
+
+import os
+import time
+import threading
+import contextvars
+
+ENABLED = os.getenv("TRACING", "1") != "0"
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+_lock = threading.Lock()
+_histograms = {}  # span name -> [bucket counts..., +Inf count, sum]
+_counters = {}    # (metric, label tuple) -> value
+
+# (trace start, list of span dicts) for the current request, or None
+_trace = contextvars.ContextVar("trace", default=None)
+_depth = contextvars.ContextVar("trace_depth", default=0)
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setitem__(self, key, value):
+        pass
+
+_NOOP = _NoopSpan()
+
+class _Span:
+    __slots__ = ("name", "attrs", "start", "token")
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+
+    def __setitem__(self, key, value):
+        self.attrs[key] = value
+
+    def __enter__(self):
+        self.token = _depth.set(_depth.get() + 1)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        _depth.reset(self.token)
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        _observe(self.name, elapsed)
+
+        trace = _trace.get()
+        if trace is not None:
+            t0, spans = trace
+            spans.append({
+                "name": self.name,
+                "start_ms": round((self.start - t0) * 1000, 2),
+                "duration_ms": round(elapsed * 1000, 2),
+                "depth": _depth.get(),
+                **self.attrs,
+            })
+        return False
+
+def span(name, **attrs):
+    """Time a stage. Use as a context manager; item assignment adds attributes."""
+    if not ENABLED:
+        return _NOOP
+    return _Span(name, attrs)
+
+def count(metric, value=1, **labels):
+    """Add to a Prometheus counter, e.g. count("llm_tokens_total", 120, kind="output")."""
+    if not ENABLED:
+        return
+    key = (metric, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+def start_trace():
+    """Collect spans for the current request/task. Returns the (live) list of spans."""
+    spans = []
+    if ENABLED:
+        _trace.set((time.perf_counter(), spans))
+    return spans
+
+def _observe(name, seconds):
+    with _lock:
+        hist = _histograms.get(name)
+        if hist is None:
+            hist = _histograms[name] = [0] * (len(BUCKETS) + 2)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                hist[i] += 1
+                break
+        else:
+            hist[len(BUCKETS)] += 1
+        hist[-1] += seconds
+
+def render_metrics():
+    """Prometheus text exposition of all span histograms and counters."""
+    lines = [
+        "# HELP code2pcb_stage_duration_seconds Time spent in each pipeline stage",
+        "# TYPE code2pcb_stage_duration_seconds histogram",
+    ]
+    with _lock:
+        histograms = {k: list(v) for k, v in _histograms.items()}
+        counters = dict(_counters)
+
+    for name in sorted(histograms):
+        hist = histograms[name]
+        cumulative = 0
+        for bound, n in zip(BUCKETS, hist):
+            cumulative += n
+            lines.append(f'code2pcb_stage_duration_seconds_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+        cumulative += hist[len(BUCKETS)]
+        lines.append(f'code2pcb_stage_duration_seconds_bucket{{stage="{name}",le="+Inf"}} {cumulative}')
+        lines.append(f'code2pcb_stage_duration_seconds_sum{{stage="{name}"}} {hist[-1]:.6f}')
+        lines.append(f'code2pcb_stage_duration_seconds_count{{stage="{name}"}} {cumulative}')
+
+    seen = set()
+    for (metric, labels), value in sorted(counters.items()):
+        if metric not in seen:
+            lines.append(f"# TYPE code2pcb_{metric} counter")
+            seen.add(metric)
+        label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+        lines.append(f"code2pcb_{metric}{{{label_text}}} {value}")
+    return "\n".join(lines) + "\n"
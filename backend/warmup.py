@@ -0,0 +1,85 @@
+# Background warm-up after boot, so the first upload doesn't pay for a cold
+# `board listall`, library index and core builds.
+#
+# Runs once per process in a daemon thread; readiness() is served at /ready.
+# Set WARMUP=0 to skip it (tests, benchmarks, one-off scripts).
+
+import os
+import time
+import threading
+
+from tracing import span
+
+ENABLED = os.getenv("WARMUP", "1") != "0"
+
+# Includes worth resolving before anyone asks (most common in uploaded sketches)
+COMMON_INCLUDES = [
+    "Wire.h", "SPI.h", "Servo.h", "SoftwareSerial.h", "EEPROM.h",
+    "DHT.h", "Adafruit_Sensor.h", "Adafruit_GFX.h", "Adafruit_SSD1306.h",
+    "LiquidCrystal_I2C.h", "OneWire.h", "DallasTemperature.h", "WiFi.h",
+]
+
+_lock = threading.Lock()
+_thread = None
+_state = {"status": "idle", "steps": {}, "started_at": None, "finished_at": None}
+
+def readiness():
+    """Snapshot of the warm-up state: status is idle / warming / ready."""
+    from openai_agent import openai_api_key
+
+    with _lock:
+        state = {**_state, "steps": dict(_state["steps"])}
+    state["llm_configured"] = bool(openai_api_key())
+    return state
+
+def _step(name, fn):
+    with _lock:
+        _state["steps"][name] = "running"
+    try:
+        with span(f"warmup.{name}"):
+            result = fn()
+    except Exception as e:
+        result = f"failed: {e}"
+    with _lock:
+        _state["steps"][name] = result
+
+def _warm_boards():
+    from compile import get_installed_boards
+    boards = get_installed_boards(refresh=True)
+    return f"{len(boards)} boards" if boards else "failed: no boards installed"
+
+def _warm_libraries():
+    from compile import resolve_library
+    found = sum(1 for lib in COMMON_INCLUDES if resolve_library(lib))
+    return f"{found}/{len(COMMON_INCLUDES)} resolved"
+
+def _warm_cores():
+    from compile import PRIORITY_BOARDS, get_installed_boards, warm_core
+    boards = get_installed_boards()
+    built = [fqbn for fqbn in PRIORITY_BOARDS if fqbn in boards and warm_core(fqbn)]
+    return f"{len(built)} cores built"
+
+def _run():
+    with _lock:
+        _state["status"] = "warming"
+        _state["started_at"] = time.time()
+    print("🔥 Warming up board list, libraries and cores ...")
+    _step("boards", _warm_boards)
+    _step("libraries", _warm_libraries)
+    _step("cores", _warm_cores)
+    with _lock:
+        _state["status"] = "ready"
+        _state["finished_at"] = time.time()
+    print("✅ Warm-up finished")
+
+def start_warmup():
+    """Start the warm-up thread once per process (no-op when WARMUP=0)."""
+    global _thread
+    with _lock:
+        if _thread is not None:
+            return
+        if not ENABLED:
+            _state["status"] = "ready"
+            return
+        _thread = threading.Thread(target=_run, name="warmup", daemon=True)
+        _thread.start()